@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""Benchmark subterfuge.main and subTerra.main end to end without the internet.
+
+The repository is copied into a scratch workspace and every external tool is
+replaced by bench/fake_tool.py: generators and discovery tools emit a
+synthetic scope of N unique names, httpx answers with a configurable live
+ratio and per-round latency, and an in-process UDP server stands in for the
+DNS resolvers when --resolve is given. Each (script, scope) pair runs in its
+own interpreter so memory figures are not shared, and the per-stage records
+it appends to metrics.jsonl are reported as a table.
+
+    python bench/bench_pipeline.py --scopes 1k,10k,100k
+    python bench/bench_pipeline.py --scripts subterfuge --scopes 10M --latency-ms 0 --dedup hash
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+from engine.metrics import METRICS_FILE, revision
+from fake_tool import DISCOVERY_TOOLS, PERMUTATION_TOOLS, score
+
+SCRIPTS = {
+    "subterfuge": ("", "subterfuge"),
+    "subterra": ("SubdomainTool", "subTerra"),
+}
+FAKE_TOOLS = PERMUTATION_TOOLS + DISCOVERY_TOOLS + (
+    "httpx", "go", "altdns", "puredns", "lepus", "dnsenum")
+SUFFIXES = {"k": 1000, "m": 1000000}
+
+
+def parse_count(value):
+    """'10k' -> 10000, '10M' -> 10000000."""
+    value = value.strip().lower()
+    if value[-1:] in SUFFIXES:
+        return int(float(value[:-1]) * SUFFIXES[value[-1]])
+    return int(value)
+
+
+class _StubResolver(asyncio.DatagramProtocol):
+    """Answer A queries from the shared score: resolve_ratio of names get an address, the rest NXDOMAIN."""
+
+    def __init__(self, resolve_ratio, latency):
+        self.resolve_ratio = resolve_ratio
+        self.latency = latency
+        self.transport = None
+        self.loop = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.loop = asyncio.get_running_loop()
+
+    def datagram_received(self, data, addr):
+        labels = []
+        offset = 12
+        while data[offset]:
+            length = data[offset]
+            labels.append(data[offset + 1:offset + 1 + length].decode('ascii', 'replace'))
+            offset += length + 1
+        question = data[12:offset + 5]
+        name = '.'.join(labels).lower()
+        bucket = score(name)
+        if bucket < self.resolve_ratio * 10000:
+            # A per-name address, so random wildcard probes never match a real candidate's answer
+            address = socket.inet_aton(f"10.{bucket // 256 % 256}.{bucket % 256}.{len(name) % 256}")
+            answer = b'\xc0\x0c' + struct.pack(">HHIH", 1, 1, 60, 4) + address
+            header = struct.pack(">HHHHHH", struct.unpack_from(">H", data)[0], 0x8180, 1, 1, 0, 0)
+        else:
+            answer = b''
+            header = struct.pack(">HHHHHH", struct.unpack_from(">H", data)[0], 0x8183, 1, 0, 0, 0)
+        response = header + question + answer
+        if self.latency:
+            self.loop.call_later(self.latency, self.transport.sendto, response, addr)
+        else:
+            self.transport.sendto(response, addr)
+
+
+def start_dns_stub(resolve_ratio, latency):
+    """Serve the stub on 127.0.0.1 from a daemon thread and return its 'ip:port'."""
+    ready = threading.Event()
+    address = {}
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        transport, _ = loop.run_until_complete(loop.create_datagram_endpoint(
+            lambda: _StubResolver(resolve_ratio, latency), local_addr=("127.0.0.1", 0)))
+        address["value"] = "%s:%d" % transport.get_extra_info("sockname")[:2]
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, name="dns-stub", daemon=True).start()
+    ready.wait()
+    return address["value"]
+
+
+def build_workspace(path):
+    """Copy the scripts into path and put a fake_tool.py link on a private PATH for every tool."""
+    shutil.copytree(REPO_DIR, path, dirs_exist_ok=True,
+                    ignore=shutil.ignore_patterns(".git", "results", "bench", "__pycache__", "*.jsonl"))
+    bin_dir = os.path.join(path, "bin")
+    os.makedirs(bin_dir, exist_ok=True)
+    os.makedirs(os.path.join(path, "tmp"), exist_ok=True)
+    fake = os.path.join(bin_dir, "fake_tool.py")
+    shutil.copy(os.path.join(BENCH_DIR, "fake_tool.py"), fake)
+    os.chmod(fake, 0o755)
+    for tool in FAKE_TOOLS:
+        os.symlink(fake, os.path.join(bin_dir, tool))
+    return bin_dir
+
+
+def write_seeds(workspace, domain, count):
+    """subterfuge.py seeds its generators from the discovery stage's live file."""
+    folder = os.path.join(workspace, "SubdomainTool", "results", domain)
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, "live_subdomains.txt"), 'w') as file:
+        file.writelines(f"seed{i}.{domain}\n" for i in range(count))
+
+
+def run_main(workspace, bin_dir, script, domain, scope, options, env_options, log_path):
+    """Run <script>.main(domain, **options) in a fresh interpreter; return (wall, peak_rss_mb, exit_code)."""
+    subdir, module = SCRIPTS[script]
+    code = (f"import logging, sys; sys.path.insert(0, {os.path.join(workspace, subdir)!r}); import {module}; "
+            f"logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout); "
+            f"{module}.main({domain!r}, **{options!r})")
+    env = os.environ.copy()
+    env.update({
+        "PATH": bin_dir + os.pathsep + env.get("PATH", ""),
+        "GOPATH": os.path.join(workspace, "go"),
+        "XDG_CACHE_HOME": os.path.join(workspace, "cache"),
+        "TMPDIR": os.path.join(workspace, "tmp"),
+        "BENCH_DOMAIN": domain,
+        "BENCH_SCOPE": str(scope),
+        **env_options,
+    })
+    start = time.perf_counter()
+    with open(log_path, 'w') as log:
+        process = subprocess.Popen([sys.executable, "-c", code], cwd=workspace, env=env,
+                                   stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - start
+    return wall, usage.ru_maxrss / 1024, os.waitstatus_to_exitcode(status)
+
+
+def read_metrics(path):
+    """Records of the most recent run in a metrics.jsonl file."""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as file:
+        records = [json.loads(line) for line in file if line.strip()]
+    if not records:
+        return []
+    run_id = records[-1]["run_id"]
+    return [record for record in records if record["run_id"] == run_id]
+
+
+def format_value(value, spec=""):
+    return "-" if value is None else format(value, spec)
+
+
+def print_stages(records):
+    print(f"  {'Stage':<24} {'Wall s':>9} {'In':>11} {'Out':>11} {'Lines/s':>12} {'RSS MB':>8}")
+    for record in records:
+        print(f"  {record['stage']:<24} {record['wall_s']:>9.3f} {format_value(record['in']):>11} "
+              f"{format_value(record['out']):>11} {format_value(record['lines_per_s'], ',.0f'):>12} "
+              f"{record['peak_rss_mb']:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark with fake tools")
+    parser.add_argument("--scopes", default="1k,10k,100k",
+                        help="Comma-separated unique candidate counts per run (k and M suffixes allowed)")
+    parser.add_argument("--scripts", default="subterfuge,subterra",
+                        help=f"Comma-separated entry points to run, from: {', '.join(SCRIPTS)}")
+    parser.add_argument("--seeds", type=int, default=200, help="Seed hosts written for subterfuge.py")
+    parser.add_argument("--overlap", type=float, default=0.3,
+                        help="Fraction of its neighbour's output each fake tool repeats")
+    parser.add_argument("--invalid", type=float, default=0.01, help="Fraction of fake output that is invalid")
+    parser.add_argument("--live-ratio", type=float, default=0.05, help="Fraction of names the fake httpx reports live")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="Fake httpx delay per round of -t hosts")
+    parser.add_argument("--saturation", type=int, default=0,
+                        help="Total httpx threads above which the fake httpx slows down proportionally (0: never)")
+    parser.add_argument("--adaptive", action="store_true", help="Run the liveness stage with --adaptive")
+    parser.add_argument("--max-threads", type=int, help="Passed through with --adaptive")
+    parser.add_argument("--resolve", action="store_true", help="Run subterfuge.py with --resolve against a local DNS stub")
+    parser.add_argument("--resolve-ratio", type=float, default=0.3, help="Fraction of names the DNS stub resolves")
+    parser.add_argument("--dns-latency-ms", type=float, default=1.0, help="DNS stub delay per answer")
+    parser.add_argument("--workers", type=int, help="Passed through to main()")
+    parser.add_argument("--batch-size", type=int, help="Passed through to main()")
+    parser.add_argument("--jobs", type=int, help="Passed through to main()")
+    parser.add_argument("--dedup", help="Passed through to subterfuge.main()")
+    parser.add_argument("--workspace", help="Scratch directory to use instead of a temporary one (kept afterwards)")
+    parser.add_argument("--output", help="Write every run's summary and stage records to this JSON file")
+    args = parser.parse_args()
+
+    scopes = [parse_count(scope) for scope in args.scopes.split(",") if scope.strip()]
+    scripts = [script.strip().lower() for script in args.scripts.split(",") if script.strip()]
+    unknown = [script for script in scripts if script not in SCRIPTS]
+    if unknown:
+        parser.error(f"unknown script(s): {', '.join(unknown)}")
+
+    workspace = args.workspace or tempfile.mkdtemp(prefix="subterfuge-bench-")
+    bin_dir = build_workspace(workspace)
+    env_options = {
+        "BENCH_OVERLAP": str(args.overlap),
+        "BENCH_INVALID": str(args.invalid),
+        "BENCH_LIVE_RATIO": str(args.live_ratio),
+        "BENCH_LATENCY_MS": str(args.latency_ms),
+        "BENCH_SATURATION": str(args.saturation),
+    }
+    common = {key: value for key, value in (("workers", args.workers), ("batch_size", args.batch_size),
+                                            ("jobs", args.jobs)) if value is not None}
+    if args.adaptive:
+        common["probe"] = {"adaptive": True}
+        if args.max_threads:
+            common["probe"]["max_threads"] = args.max_threads
+    dns = None
+    if args.resolve:
+        dns = {"resolvers": [start_dns_stub(args.resolve_ratio, args.dns_latency_ms / 1000)]}
+
+    print(f"Workspace: {workspace}")
+    print(f"Revision: {revision(REPO_DIR) or 'unknown'}\n")
+    runs = []
+    try:
+        for scope in scopes:
+            for script in scripts:
+                # A fresh domain per run, so incremental state from earlier runs never skips work
+                domain = f"{script}{scope}-{int(time.time())}.bench.test"
+                options = dict(common, skip_bootstrap=False)
+                if script == "subterfuge":
+                    write_seeds(workspace, domain, args.seeds)
+                    if args.dedup:
+                        options["dedup"] = args.dedup
+                    if dns is not None:
+                        options["dns"] = dns
+                subdir, _ = SCRIPTS[script]
+                results = os.path.join(workspace, subdir, "results", domain)
+                log_path = os.path.join(workspace, f"{domain}.log")
+                print(f"[*] {script} on {scope:,} candidates ({domain})")
+                wall, peak, exit_code = run_main(workspace, bin_dir, script, domain, scope, options,
+                                                 env_options, log_path)
+                records = read_metrics(os.path.join(results, METRICS_FILE))
+                print_stages(records)
+                status = "ok" if exit_code == 0 else f"exit {exit_code}, see {log_path}"
+                print(f"  {'process':<24} {wall:>9.3f} {'':>11} {'':>11} {scope / wall:>12,.0f} {peak:>8.1f}  {status}\n")
+                runs.append({"script": script, "scope": scope, "domain": domain, "wall_s": round(wall, 3),
+                             "peak_rss_mb": round(peak, 1), "exit_code": exit_code, "stages": records})
+    finally:
+        if not args.workspace:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    print(f"{'Script':<12} {'Scope':>12} {'Wall s':>9} {'Cands/s':>12} {'RSS MB':>8} {'Live':>9}")
+    for run in runs:
+        total = next((record for record in run["stages"] if record["stage"] == "total"), {})
+        print(f"{run['script']:<12} {run['scope']:>12,} {run['wall_s']:>9.3f} "
+              f"{run['scope'] / run['wall_s']:>12,.0f} {run['peak_rss_mb']:>8.1f} {format_value(total.get('out')):>9}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({"revision": revision(REPO_DIR), "options": vars(args), "runs": runs}, file, indent=2)
+        print(f"\nResults written to {args.output}")
+    return 0 if all(run["exit_code"] == 0 for run in runs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
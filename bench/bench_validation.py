@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Microbenchmark: host name validation against plain line I/O.
+
+Writes a synthetic candidate file, times reading it line by line, then times
+the original per-call idna + re.compile validator and engine.validation on
+the same lines. Validation still costs several times the bare read pass,
+since every line pays for a Python call and a regex match, so the
+benchmark fails if it exceeds --max-overhead times the read pass.
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+import idna
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine.validation import is_valid_domain, validate_batch
+
+DEFAULT_MAX_OVERHEAD = 10.0
+
+
+def legacy_is_valid_domain(domain):
+    """The validator both scripts used before engine.validation."""
+    if not domain:
+        return False
+    try:
+        punycode_domain = idna.encode(domain).decode('ascii')
+    except idna.IDNAError:
+        return False
+    regex = re.compile(
+        r'^(?=.{1,253}$)(?!-)[A-Za-z0-9-]{1,63}(?<!-)'
+        r'(\.(?!-)[A-Za-z0-9-]{1,63}(?<!-))*'
+        r'\.[A-Za-z]{2,}$'
+    )
+    return re.match(regex, punycode_domain) is not None
+
+
+def write_candidates(path, count, seed=0):
+    """Write count permutation-like lines, a few of them invalid or non-ASCII."""
+    rng = random.Random(seed)
+    words = ["dev", "api", "stage", "prod", "test", "eu-west-1", "2024", "mail", "vpn", "cdn"]
+    with open(path, 'w') as file:
+        for i in range(count):
+            roll = rng.random()
+            if roll < 0.01:
+                line = f"bad_{i}..example.com"
+            elif roll < 0.02:
+                line = f"bücher{i}.example.com"
+            else:
+                line = f"{rng.choice(words)}-{rng.choice(words)}{i % 100}.svc{i % 50}.example.com"
+            file.write(line + '\n')
+
+
+def timed(label, count, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f}s  {elapsed / count * 1e9:8.0f} ns/line  {count / elapsed:12,.0f} lines/s")
+    return elapsed, result
+
+
+def main(count, skip_legacy, max_overhead=DEFAULT_MAX_OVERHEAD):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "candidates.txt")
+        write_candidates(path, count)
+        print(f"{count:,} candidate lines, {os.path.getsize(path) / 1048576:.1f} MiB\n")
+
+        def read_only():
+            with open(path) as file:
+                return sum(1 for line in file if line.strip())
+
+        def fast():
+            with open(path) as file:
+                return sum(1 for line in file if is_valid_domain(line.strip()))
+
+        def batch():
+            with open(path) as file:
+                return validate_batch(file)
+
+        def legacy():
+            with open(path) as file:
+                return sum(1 for line in file if legacy_is_valid_domain(line.strip()))
+
+        io_time, _ = timed("read + strip (I/O only)", count, read_only)
+        fast_time, accepted = timed("engine.validation", count, fast)
+        _, (_, rejected) = timed("validate_batch", count, batch)
+        print(f"\naccepted {accepted:,}, rejected {dict(rejected)}")
+        print(f"validation overhead over I/O: {fast_time / io_time:.1f}x the read pass")
+        if max_overhead and fast_time / io_time > max_overhead:
+            print(f"FAILED: validation costs more than {max_overhead}x the read pass")
+            return 1
+
+        if not skip_legacy:
+            legacy_time, legacy_accepted = timed("\nlegacy idna + re.compile", count, legacy)
+            print(f"speedup over legacy validator: {legacy_time / fast_time:.1f}x")
+            if legacy_accepted != accepted:
+                print(f"MISMATCH: legacy accepted {legacy_accepted:,}, engine accepted {accepted:,}")
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark host name validation")
+    parser.add_argument("--lines", type=int, default=1_000_000, help="Number of candidate lines to generate")
+    parser.add_argument("--skip-legacy", action="store_true", help="Do not time the original validator")
+    parser.add_argument("--max-overhead", type=float, default=DEFAULT_MAX_OVERHEAD, metavar="RATIO",
+                        help="Fail if validation takes more than RATIO times the read pass (0 to disable)")
+    args = parser.parse_args()
+
+    sys.exit(main(args.lines, args.skip_legacy, args.max_overhead))
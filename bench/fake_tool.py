@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Stand-in for every external tool the pipelines call, picked by argv[0].
+
+bench_pipeline.py symlinks this file under each tool name (alterx, gotator,
+amass, httpx, go, ...). Output is synthetic and deterministic, sized
+and shaped by BENCH_* environment variables:
+
+    BENCH_DOMAIN      domain the synthetic names live under
+    BENCH_SCOPE       unique candidates emitted across all generators
+    BENCH_OVERLAP     fraction of its neighbour's slice each generator repeats
+    BENCH_INVALID     fraction of emitted lines that fail validation
+    BENCH_LIVE_RATIO  fraction of names the fake httpx reports live
+    BENCH_LATENCY_MS  fake httpx delay per round of -t hosts
+    BENCH_SATURATION  total threads (all fake httpx processes) above which rounds slow down
+"""
+
+import atexit
+import glob
+import itertools
+import os
+import sys
+import time
+import zlib
+
+PERMUTATION_TOOLS = ("alterx", "gotator", "dnsgen", "ripgen")
+DISCOVERY_TOOLS = ("amass", "assetfinder", "sublist3r", "findomain", "subfinder")
+
+
+def score(host):
+    """Stable bucket in [0, 10000) shared by the fake httpx and the DNS stand-in."""
+    return zlib.crc32(host.encode()) % 10000
+
+
+def is_live(host, ratio):
+    return score(host) < ratio * 10000
+
+
+def synthetic_names(tool, tools, domain, scope, overlap, invalid):
+    """Yield this tool's slice of the scope plus a repeat of its neighbour's, with some invalid lines."""
+    index = tools.index(tool)
+    size = max(1, scope // len(tools))
+    start = index * size
+    stop = scope if index == len(tools) - 1 else start + size
+    repeat = int(size * overlap)
+    invalid_every = int(1 / invalid) if invalid > 0 else 0
+    indices = itertools.chain(range(start, stop), (i % scope for i in range(stop, stop + repeat)))
+    for count, i in enumerate(indices):
+        if invalid_every and count % invalid_every == invalid_every - 1:
+            yield f"bad_{i}..{domain}"
+        yield f"c{i}.{domain}"
+
+
+def option(args, *flags):
+    for flag in flags:
+        if flag in args and args.index(flag) + 1 < len(args):
+            return args[args.index(flag) + 1]
+    return None
+
+
+def write_lines(lines, path=None):
+    out = open(path, 'w') if path else sys.stdout
+    try:
+        out.writelines(line + '\n' for line in lines)
+    finally:
+        if path:
+            out.close()
+
+
+def fake_httpx(args):
+    threads = int(option(args, "-t") or 50)
+    ratio = float(os.environ.get("BENCH_LIVE_RATIO", "0.05"))
+    latency = float(os.environ.get("BENCH_LATENCY_MS", "0")) / 1000
+    saturation = int(os.environ.get("BENCH_SATURATION", "0"))
+    if saturation:
+        # Every running fake httpx registers its threads, so the slowdown reflects the whole pool
+        register = os.path.join(os.environ.get("TMPDIR", "/tmp"), f"bench-httpx-{os.getpid()}")
+        with open(register, 'w') as file:
+            file.write(str(threads))
+        atexit.register(os.remove, register)
+    round_hosts = []
+
+    def flush():
+        if latency and saturation:
+            running = 0
+            for path in glob.glob(os.path.join(os.environ.get("TMPDIR", "/tmp"), "bench-httpx-*")):
+                try:
+                    with open(path, 'r') as file:
+                        running += int(file.read() or 0)
+                except (OSError, ValueError):
+                    pass
+            time.sleep(latency * max(1.0, running / saturation))
+        elif latency:
+            time.sleep(latency)
+        for host in round_hosts:
+            if is_live(host, ratio):
+                sys.stdout.write(f"https://{host}\n")
+        sys.stdout.flush()
+        round_hosts.clear()
+
+    for line in sys.stdin:
+        host = line.strip()
+        if host:
+            round_hosts.append(host)
+        if len(round_hosts) >= threads:
+            flush()
+    if round_hosts:
+        flush()
+
+
+def main():
+    tool = os.path.basename(sys.argv[0])
+    args = sys.argv[1:]
+    if args and args[0] in ("-version", "--version", "version"):
+        print(f"{tool} bench-fake")
+        return
+    if tool == "go":
+        if args[:2] == ["env", "GOPATH"]:
+            print(os.environ.get("GOPATH", os.path.expanduser("~/go")))
+        return
+    if tool == "httpx":
+        fake_httpx(args)
+        return
+
+    domain = os.environ.get("BENCH_DOMAIN", "bench.test")
+    scope = int(os.environ.get("BENCH_SCOPE", "1000"))
+    overlap = float(os.environ.get("BENCH_OVERLAP", "0.3"))
+    invalid = float(os.environ.get("BENCH_INVALID", "0.01"))
+    if tool in PERMUTATION_TOOLS:
+        write_lines(synthetic_names(tool, PERMUTATION_TOOLS, domain, scope, overlap, invalid))
+    elif tool in DISCOVERY_TOOLS:
+        names = synthetic_names(tool, DISCOVERY_TOOLS, domain, scope, overlap, invalid)
+        if tool == "amass":
+            names = (f"{name} (FQDN) --> a_record --> 10.0.0.1 (IPAddress)" for name in names)
+        write_lines(names, option(args, "-o", "-u"))
+
+
+if __name__ == "__main__":
+    main()
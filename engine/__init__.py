@@ -0,0 +1,9 @@
+"""Shared building blocks and the scan stages behind subterfuge.py and SubdomainTool/subTerra.py.
+
+Everything logs through the "engine" logger; the CLIs send it to stdout,
+and library callers see nothing until they configure logging themselves.
+"""
+
+import logging
+
+logging.getLogger(__name__).addHandler(logging.NullHandler())
@@ -0,0 +1,120 @@
+"""Run scans from Python without the CLIs.
+
+Importing this module has no side effects. Each Scan holds its own options,
+status and results, so several can run at once in one process, from threads
+or an event loop:
+
+    from engine.api import Scan, scan
+
+    result = Scan("example.com", skip_bootstrap=True).run()
+
+    async for event in scan("example.com", kind="discovery"):
+        print(event["event"], event.get("probed"))
+
+Every event is a dict with event, domain and time keys plus the event's own
+data: 'started', 'stage' (a metrics record), 'tool' (discovery only),
+'progress' (probed and live counts), 'live' (newly live hosts), 'skipped',
+then 'finished' with the result, 'cancelled' or 'failed' with the error.
+Scans write nothing to stdout: their log lines go to the "engine" logger
+and httpx progress bars are off unless progress=True is passed.
+"""
+
+import asyncio
+import threading
+import time
+
+from engine import discovery, permutation
+from engine.scheduler import ScanCancelled
+
+KINDS = {"permutation": permutation.main, "discovery": discovery.main}
+
+
+class Scan:
+    """One scan of one domain: kind is 'permutation' (subterfuge.py) or 'discovery' (subTerra.py).
+
+    options are the keyword arguments of that stage's main(), e.g. workers,
+    generators or base_dir. base_dir is the repository root for both kinds,
+    so a discovery scan and a permutation scan with the same base_dir share
+    their results.
+    """
+
+    def __init__(self, domain, kind="permutation", **options):
+        if kind not in KINDS:
+            raise ValueError(f"unknown scan kind {kind!r}, expected one of: {', '.join(KINDS)}")
+        self.domain = domain
+        self.kind = kind
+        self.options = dict({"progress": False}, **options)
+        self.status = "pending"
+        self.result = None
+        self.error = None
+        self.live = set()
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        """Ask the scan to stop; run() then ends with a 'cancelled' event and returns None.
+
+        The tools are stopped at once, but httpx batches already under way
+        are allowed to finish.
+        """
+        self._cancel.set()
+
+    def run(self, on_event=None):
+        """Run the scan in this thread, passing each event to on_event; returns the result dict.
+
+        The result is None when there was nothing to scan or the scan was
+        cancelled. Errors are re-raised after the 'failed' event.
+        """
+        with self._lock:
+            if self.status != "pending":
+                raise RuntimeError(f"scan of {self.domain} is already {self.status}")
+            self.status = "running"
+
+        def emit(kind, **data):
+            if kind == "live":
+                self.live.update(data["hosts"])
+                data["hosts"] = sorted(data["hosts"])
+            if on_event is not None:
+                on_event({"event": kind, "domain": self.domain, "time": time.time(), **data})
+
+        try:
+            self.result = KINDS[self.kind](self.domain, events=emit, cancel=self._cancel, **self.options)
+        except ScanCancelled:
+            self.status = "cancelled"
+            emit("cancelled")
+            return None
+        except BaseException as e:
+            self.status, self.error = "failed", e
+            emit("failed", error=str(e) or type(e).__name__)
+            raise
+        self.status = "finished"
+        emit("finished", result=self.result)
+        return self.result
+
+    async def stream(self):
+        """Run the scan on a worker thread and yield its events as they happen.
+
+        Closing the stream (aclose()), or cancelling the task iterating it, cancels the scan.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        future = loop.run_in_executor(None, self.run, lambda event: loop.call_soon_threadsafe(queue.put_nowait, event))
+        try:
+            while True:
+                event = await queue.get()
+                yield event
+                if event["event"] in ("finished", "cancelled", "failed"):
+                    break
+        finally:
+            if not future.done():
+                self.cancel()
+            try:
+                await future
+            except Exception:
+                pass  # already reported by the 'failed' event and kept in self.error
+
+
+async def scan(domain, kind="permutation", **options):
+    """Run one scan and yield its events; the last is 'finished', 'cancelled' or 'failed'."""
+    async for event in Scan(domain, kind, **options).stream():
+        yield event
@@ -0,0 +1,220 @@
+"""Shared, content-hashed cache for downloaded and compiled wordlists.
+
+Downloads are kept once per machine under ~/.cache/subterfuge/assets,
+named by the sha256 of their contents, with a manifest mapping each URL to
+its hash. Wordlists are compiled once into a deduplicated .words file that
+is memory-mapped on use, so concurrent runs and processes share the same
+pages instead of each parsing its own copy. With offline set nothing is
+downloaded and a missing asset is an error.
+
+    python3 -m engine.assets fetch https://example.com/words.txt
+    python3 -m engine.assets compile words.txt
+    python3 -m engine.assets list
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import time
+import urllib.request
+from collections.abc import Sequence
+
+from engine.bootstrap import CACHE_FILE, load_cache, save_cache
+from engine.state import file_hash
+
+ASSET_DIR = os.path.join(os.path.dirname(CACHE_FILE), "assets")
+MANIFEST = "manifest.json"
+SECLISTS_SUBDOMAINS = ("https://raw.githubusercontent.com/danielmiessler/SecLists/master/"
+                       "Discovery/DNS/subdomains-top1million-110000.txt")
+WORDS_MAGIC = b"WORDS\x01"
+_WORDS_HEADER = struct.Struct("<6sQ")  # magic, word count; then count + 1 offsets and the word bytes
+_OFFSET = struct.Struct("<Q")
+
+
+def is_url(value):
+    return value.startswith(("http://", "https://"))
+
+
+def _manifest_file(cache_dir):
+    return os.path.join(cache_dir, MANIFEST)
+
+
+def cached_hash(path, cache_dir=ASSET_DIR):
+    """sha256 of a local file, only re-read when its size or mtime has changed since the last call."""
+    manifest = load_cache(_manifest_file(cache_dir))
+    key = f"file:{os.path.abspath(path)}"
+    stat = os.stat(path)
+    entry = manifest.get(key)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha256"]
+    digest = file_hash(path)
+    manifest[key] = {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    save_cache(manifest, _manifest_file(cache_dir))
+    return digest
+
+
+def fetch(url, offline=False, sha256=None, cache_dir=ASSET_DIR):
+    """Return the path of url's cached copy, downloading it first if needed.
+
+    sha256, if given, is checked against the download and against the
+    cached copy. Raises FileNotFoundError when offline and url is not
+    cached, and ValueError when the content does not match sha256.
+    """
+    manifest = load_cache(_manifest_file(cache_dir))
+    entry = manifest.get(url)
+    if entry and (sha256 is None or entry["sha256"] == sha256):
+        path = os.path.join(cache_dir, entry["file"])
+        if os.path.exists(path):
+            return path
+    if offline:
+        raise FileNotFoundError(f"{url} is not in the asset cache ({cache_dir}) and downloads are off")
+
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_path = os.path.join(cache_dir, f"download.{os.getpid()}.tmp")
+    digest = hashlib.sha256()
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response, open(temp_path, 'wb') as file:
+            for block in iter(lambda: response.read(1 << 20), b''):
+                digest.update(block)
+                file.write(block)
+        if sha256 is not None and digest.hexdigest() != sha256:
+            raise ValueError(f"{url} has sha256 {digest.hexdigest()}, expected {sha256}")
+        name = f"{digest.hexdigest()}{os.path.splitext(url.rsplit('/', 1)[-1])[1] or '.txt'}"
+        os.replace(temp_path, os.path.join(cache_dir, name))
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    manifest = load_cache(_manifest_file(cache_dir))
+    manifest[url] = {"file": name, "sha256": digest.hexdigest(), "size": os.path.getsize(os.path.join(cache_dir, name)),
+                     "fetched_at": time.time()}
+    save_cache(manifest, _manifest_file(cache_dir))
+    return os.path.join(cache_dir, name)
+
+
+def compile_words(source, output):
+    """Write source's words, without blanks, comments or repeats, to output as a .words file."""
+    words = []
+    seen = set()
+    with open(source, 'rb') as file:
+        for line in file:
+            word = line.strip()
+            if word and not word.startswith(b'#') and word not in seen:
+                seen.add(word)
+                words.append(word)
+    temp_path = f"{output}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(_WORDS_HEADER.pack(WORDS_MAGIC, len(words)))
+        offset = 0
+        for word in words:
+            file.write(_OFFSET.pack(offset))
+            offset += len(word)
+        file.write(_OFFSET.pack(offset))
+        file.write(b''.join(words))
+    os.replace(temp_path, output)
+    return len(words)
+
+
+class WordList(Sequence):
+    """Read-only, memory-mapped view of a .words file; words are decoded as they are read.
+
+    source_hash is the sha256 of the wordlist it was compiled from, if known.
+    """
+
+    def __init__(self, path, source_hash=None):
+        self.path = path
+        self.source_hash = source_hash
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = _WORDS_HEADER.unpack_from(self._map)
+        if magic != WORDS_MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a compiled wordlist")
+        self._offsets = _WORDS_HEADER.size
+        self._data = self._offsets + (self.count + 1) * _OFFSET.size
+
+    def __len__(self):
+        return self.count
+
+    def _span(self, index):
+        start, end = struct.unpack_from("<QQ", self._map, self._offsets + index * _OFFSET.size)
+        return self._data + start, self._data + end
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("word index out of range")
+        start, end = self._span(index)
+        return self._map[start:end].decode(errors='replace')
+
+    def __iter__(self):
+        for index in range(self.count):
+            start, end = self._span(index)
+            yield self._map[start:end].decode(errors='replace')
+
+    def close(self):
+        self._map.close()
+
+
+def load_wordlist(source, offline=False, cache_dir=ASSET_DIR):
+    """Open a wordlist file or URL through the cache, compiling it on first use."""
+    path = fetch(source, offline=offline, cache_dir=cache_dir) if is_url(source) else source
+    source_hash = cached_hash(path, cache_dir)
+    compiled = os.path.join(cache_dir, f"{source_hash}.words")
+    if not os.path.exists(compiled):
+        os.makedirs(cache_dir, exist_ok=True)
+        compile_words(path, compiled)
+    return WordList(compiled, source_hash)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python3 -m engine.assets",
+                                     description="Fill, inspect and check the shared wordlist cache")
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("fetch", help="Download a URL into the cache")
+    command.add_argument("url", nargs="?", default=SECLISTS_SUBDOMAINS)
+    command.add_argument("--sha256", help="Expected sha256 of the content")
+    command = commands.add_parser("compile", help="Compile a wordlist file or URL for memory-mapped use")
+    command.add_argument("source")
+    command.add_argument("--offline", action="store_true", help="Fail rather than download")
+    commands.add_parser("list", help="List cached downloads")
+    commands.add_parser("verify", help="Re-hash every cached download against the manifest")
+    parser.add_argument("--cache-dir", default=ASSET_DIR, help="Asset cache folder")
+    args = parser.parse_args(argv)
+
+    if args.command in ("fetch", "compile"):
+        try:
+            if args.command == "fetch":
+                print(fetch(args.url, sha256=args.sha256, cache_dir=args.cache_dir))
+            else:
+                words = load_wordlist(args.source, offline=args.offline, cache_dir=args.cache_dir)
+                print(f"{words.path}: {len(words)} unique words")
+                words.close()
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            return 1
+    else:
+        manifest = load_cache(_manifest_file(args.cache_dir))
+        failed = 0
+        for url, entry in sorted(manifest.items()):
+            if not is_url(url):
+                continue
+            path = os.path.join(args.cache_dir, entry["file"])
+            if args.command == "list":
+                print(f"{url}\n  {path} ({entry['size']} bytes, sha256 {entry['sha256']}, "
+                      f"fetched {time.ctime(entry['fetched_at'])})")
+                continue
+            ok = os.path.exists(path) and file_hash(path) == entry["sha256"]
+            failed += not ok
+            print(f"{'ok' if ok else 'FAILED'}  {url}")
+        return 1 if failed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
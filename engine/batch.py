@@ -0,0 +1,66 @@
+"""Run one scan per domain concurrently, sharing whatever the caller set up once."""
+
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from engine.scheduler import format_elapsed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARALLEL = 4
+
+
+def load_domains(path):
+    """Read apex domains from a file, or stdin for '-', dropping blanks, comments and repeats."""
+    file = sys.stdin if path == "-" else open(path, 'r')
+    try:
+        domains = []
+        for line in file:
+            domain = line.split('#', 1)[0].strip().lower().rstrip('.')
+            if domain and domain not in domains:
+                domains.append(domain)
+        return domains
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+
+def run_batch(domains, scan, parallel=DEFAULT_PARALLEL):
+    """Call scan(domain) for every domain, at most parallel at a time.
+
+    Domains run in their own threads, so a slow scope only holds its own
+    slot; anything shared between scans (tool paths, parsed patterns, the
+    httpx pool) is created by the caller and closed over by scan. A failing
+    domain is reported and does not stop the others. Returns one summary
+    dict per domain in completion order.
+    """
+    summaries = []
+    with ThreadPoolExecutor(max_workers=max(1, parallel), thread_name_prefix="domain") as executor:
+        futures = {executor.submit(_timed_scan, scan, domain): domain for domain in domains}
+        for future in as_completed(futures):
+            summaries.append(future.result())
+
+    print_batch_summary(summaries)
+    return summaries
+
+
+def _timed_scan(scan, domain):
+    start = time.time()
+    try:
+        scan(domain)
+        return {"domain": domain, "elapsed": time.time() - start, "error": None}
+    except Exception as e:
+        logger.exception(f"Error scanning {domain}: {e}")
+        return {"domain": domain, "elapsed": time.time() - start, "error": str(e) or type(e).__name__}
+
+
+def print_batch_summary(summaries):
+    """Log a per-domain table of elapsed time and failures."""
+    width = max([len(summary["domain"]) for summary in summaries] + [6])
+    logger.info(f"\n{'Domain':<{width}}  {'Elapsed':>8}  Status")
+    for summary in summaries:
+        status = "ok" if summary["error"] is None else f"failed: {summary['error']}"
+        logger.info(f"{summary['domain']:<{width}}  {format_elapsed(summary['elapsed']):>8}  {status}")
+    logger.info("")
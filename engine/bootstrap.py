@@ -0,0 +1,185 @@
+"""Cached, parallel discovery and installation of the external tools."""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from engine.process import run_command
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "subterfuge", "tools.json")
+VERSION_FLAGS = ("-version", "--version")
+MAX_CACHED_PATHS = 8
+
+
+def normalize_path(path):
+    """PATH without empty or repeated entries, in search order."""
+    return os.pathsep.join(dict.fromkeys(entry for entry in path.split(os.pathsep) if entry))
+
+
+def with_path(path, directory):
+    """PATH with directory appended unless it is already on it."""
+    return normalize_path(path + os.pathsep + directory)
+
+
+def tool_env(gopath, env=None):
+    """A copy of env (this process's environment by default) with GOPATH set and its bin directory on PATH."""
+    env = dict(env if env is not None else os.environ)
+    env["GOPATH"] = gopath
+    env["PATH"] = with_path(env.get("PATH", ""), os.path.join(gopath, "bin"))
+    return env
+
+
+def path_key(path):
+    """Fingerprint a PATH value; cached tool locations are only valid for the PATH they were found with."""
+    return hashlib.sha1(normalize_path(path).encode()).hexdigest()
+
+
+def is_executable(path):
+    return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def load_cache(cache_file=CACHE_FILE):
+    try:
+        with open(cache_file, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache, cache_file=CACHE_FILE):
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    temp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(temp_file, 'w') as file:
+        json.dump(cache, file, indent=2, sort_keys=True)
+    os.replace(temp_file, cache_file)
+
+
+def find_go_path(cache=None):
+    """Return GOPATH from the environment, the cache, `go env` or the Go default, in that order."""
+    if os.environ.get("GOPATH"):
+        return os.environ["GOPATH"].split(os.pathsep)[0]
+    if cache and cache.get("gopath"):
+        return cache["gopath"]
+    go = shutil.which("go")
+    if go:
+        try:
+            result = subprocess.run([go, "env", "GOPATH"], capture_output=True, text=True, timeout=30)
+            if result.returncode == 0 and result.stdout.strip():
+                return result.stdout.strip()
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+    return os.path.expanduser("~/go")
+
+
+def tool_version(path):
+    """Best-effort version string for a tool binary, or 'unknown'."""
+    for flag in VERSION_FLAGS:
+        try:
+            result = subprocess.run([path, flag], stdin=subprocess.DEVNULL, capture_output=True,
+                                    text=True, timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        for line in (result.stdout + result.stderr).splitlines():
+            if result.returncode == 0 and line.strip():
+                return line.strip()[:80]
+    return "unknown"
+
+
+def installer_group(command):
+    """Group install commands that must not run concurrently (one apt lock, one pip, ...)."""
+    words = command.split()
+    first = words[1] if words[0] == "sudo" and len(words) > 1 else words[0]
+    if first in ("apt", "apt-get"):
+        return "apt"
+    if first in ("pip", "python", "python3"):
+        return "pip"
+    return first
+
+
+def _install_group(commands, env):
+    for tool, command in commands:
+        logger.info(f"{tool} is not installed. Installing now...")
+        try:
+            run_command(command, env=env, timeout=1800)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            logger.error(f"Error installing {tool}: {e}")
+
+
+def ensure_tools(install_commands, env=None, skip_bootstrap=False, gopath=None, cache_file=CACHE_FILE):
+    """Make sure every tool in install_commands is on PATH and return {tool: {"path", "version"}}.
+
+    Tool locations and versions are cached in cache_file per PATH (the last
+    MAX_CACHED_PATHS of them), so callers with different PATHs do not
+    invalidate each other's entries. Cached paths that are no longer an
+    executable file are dropped and looked up again. Missing tools are installed
+    concurrently, one thread per installer (go, pip, cargo, apt, ...). With skip_bootstrap the
+    cache is trusted as-is and nothing is installed. gopath, if given, is
+    cached so later runs do not need to ask go for it.
+    """
+    start = time.time()
+    env = env if env is not None else os.environ.copy()
+    search_path = env.get("PATH", "")
+    key = path_key(search_path)
+    cache = load_cache(cache_file)
+    paths = cache.get("paths", {})
+    entry = paths.get(key)
+    if entry is None and skip_bootstrap and paths:
+        # Trust whatever was cached last, as the flag promises
+        entry = max(paths.values(), key=lambda value: value["updated_at"])
+    cached_tools = entry["tools"] if entry is not None else {}
+    # A tool removed since it was cached is looked up (and installed) again, and its entry dropped
+    stale = [tool for tool, info in cached_tools.items() if not is_executable(info["path"])]
+    cached_tools = {tool: info for tool, info in cached_tools.items() if tool not in stale}
+    if stale:
+        logger.info(f"Cached tools no longer on disk: {', '.join(sorted(stale))}")
+
+    tools = {tool: cached_tools[tool] for tool in install_commands if tool in cached_tools}
+    if skip_bootstrap:
+        logger.info(f"Skipping bootstrap: trusting {len(tools)} cached tool paths.")
+        return tools
+
+    missing = [tool for tool in install_commands if tool not in tools]
+    found = {tool: shutil.which(tool, path=search_path) for tool in missing}
+    to_install = [tool for tool, path in found.items() if path is None]
+
+    groups = {}
+    for tool in to_install:
+        groups.setdefault(installer_group(install_commands[tool]), []).append((tool, install_commands[tool]))
+    if groups:
+        with ThreadPoolExecutor(max_workers=len(groups), thread_name_prefix="install") as executor:
+            list(executor.map(lambda commands: _install_group(commands, env), groups.values()))
+        for tool in to_install:
+            found[tool] = shutil.which(tool, path=search_path)
+
+    located = {tool: path for tool, path in found.items() if path is not None}
+    with ThreadPoolExecutor(max_workers=max(1, len(located)), thread_name_prefix="version") as executor:
+        versions = dict(zip(located, executor.map(tool_version, located.values())))
+    for tool, path in located.items():
+        tools[tool] = {"path": path, "version": versions[tool]}
+
+    unavailable = [tool for tool in install_commands if tool not in tools]
+    if unavailable:
+        logger.error(f"Tools still unavailable: {', '.join(unavailable)}")
+    if missing or stale or (gopath is not None and cache.get("gopath") != gopath):
+        # Re-read so entries saved by other runs since we loaded are kept
+        cache = load_cache(cache_file)
+        cache.pop("path_key", None)
+        cache.pop("tools", None)
+        paths = cache.setdefault("paths", {})
+        paths[key] = {"tools": {**cached_tools, **tools}, "updated_at": time.time()}
+        for stale in sorted(paths, key=lambda value: paths[value]["updated_at"])[:-MAX_CACHED_PATHS]:
+            del paths[stale]
+        if gopath is not None:
+            cache["gopath"] = gopath
+        save_cache(cache, cache_file)
+
+    logger.info(f"Tools ready: {len(install_commands) - len(missing)} cached, {len(missing) - len(to_install)} found, "
+                f"{len([tool for tool in to_install if tool in tools])} installed ({time.time() - start:.2f}s)")
+    return tools
@@ -0,0 +1,223 @@
+"""Pluggable deduplication stores with a common add/contains/len interface."""
+
+import hashlib
+import os
+import sqlite3
+import sys
+from array import array
+
+STORES = ("memory", "hash", "sqlite")
+
+
+def fingerprint(item):
+    """Return a non-zero 64-bit fingerprint of a string."""
+    value = int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), 'little')
+    return value or 1
+
+
+class MemoryStore:
+    """A plain Python set; fastest, but every entry costs a full str object."""
+
+    kind = "memory"
+
+    def __init__(self, items=()):
+        self._items = set()
+        self._item_bytes = 0
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        """Add item and return True if it was not already present."""
+        if item in self._items:
+            return False
+        self._items.add(item)
+        self._item_bytes += sys.getsizeof(item)
+        return True
+
+    def update(self, items):
+        return sum(1 for item in items if self.add(item))
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def bytes_used(self):
+        return sys.getsizeof(self._items) + self._item_bytes
+
+    def close(self):
+        pass
+
+
+class HashStore:
+    """64-bit fingerprints in an open-addressing table backed by array('Q').
+
+    Entries cost 8 bytes per slot at a load factor between 0.35 and 0.7, so
+    roughly 11-23 bytes each, independent of the host name length. The store
+    only remembers fingerprints: it cannot be iterated, and two different
+    names colliding on all 64 bits (about 1 in 10^7 at 10M entries) would be
+    treated as duplicates.
+    """
+
+    kind = "hash"
+    max_load = 0.7
+
+    def __init__(self, items=(), capacity=1 << 16):
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._table = array('Q', bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+        for item in items:
+            self.add(item)
+
+    def _slot(self, value):
+        table, mask = self._table, self._mask
+        index = value & mask
+        while True:
+            current = table[index]
+            if current == 0 or current == value:
+                return index, current
+            index = (index + 1) & mask
+
+    def _grow(self):
+        old = self._table
+        self._table = array('Q', bytes(16 * len(old)))
+        self._mask = len(self._table) - 1
+        for value in old:
+            if value:
+                index, _ = self._slot(value)
+                self._table[index] = value
+
+    def add(self, item):
+        """Add item and return True if its fingerprint was not already present."""
+        value = fingerprint(item)
+        index, current = self._slot(value)
+        if current:
+            return False
+        self._table[index] = value
+        self._count += 1
+        if self._count > self.max_load * len(self._table):
+            self._grow()
+        return True
+
+    def update(self, items):
+        return sum(1 for item in items if self.add(item))
+
+    def __contains__(self, item):
+        return self._slot(fingerprint(item))[1] != 0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        raise TypeError("HashStore keeps fingerprints only and cannot be iterated")
+
+    def bytes_used(self):
+        return self._table.itemsize * len(self._table)
+
+    def close(self):
+        pass
+
+
+class SqliteStore:
+    """Entries kept in an on-disk sqlite table; memory use is bounded by the page cache.
+
+    With commit_every=None nothing is committed until commit() or close(),
+    so rollback() can discard every add since the last commit.
+    """
+
+    kind = "sqlite"
+
+    def __init__(self, path, items=(), fresh=True, temporary=False, commit_every=50000):
+        self.path = path
+        self.temporary = temporary
+        if fresh:
+            self._remove_files()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries (item TEXT PRIMARY KEY) WITHOUT ROWID")
+        self._count = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        self._pending = 0
+        self._commit_every = commit_every
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        """Add item and return True if it was not already present."""
+        cursor = self._db.execute("INSERT OR IGNORE INTO entries (item) VALUES (?)", (item,))
+        if cursor.rowcount != 1:
+            return False
+        self._count += 1
+        self._pending += 1
+        if self._commit_every is not None and self._pending >= self._commit_every:
+            self.commit()
+        return True
+
+    def commit(self):
+        self._db.commit()
+        self._pending = 0
+
+    def rollback(self):
+        """Forget the entries added since the last commit."""
+        self._db.rollback()
+        self._count -= self._pending
+        self._pending = 0
+
+    def update(self, items):
+        return sum(1 for item in items if self.add(item))
+
+    def __contains__(self, item):
+        return self._db.execute("SELECT 1 FROM entries WHERE item = ?", (item,)).fetchone() is not None
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        self.commit()
+        for (item,) in self._db.execute("SELECT item FROM entries"):
+            yield item
+
+    def bytes_used(self):
+        self.commit()
+        return sum(os.path.getsize(self.path + suffix) for suffix in ("", "-wal")
+                   if os.path.exists(self.path + suffix))
+
+    def _remove_files(self):
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def close(self):
+        self.commit()
+        self._db.close()
+        if self.temporary:
+            self._remove_files()
+
+
+def open_store(kind="memory", path=None):
+    """Create a scratch dedup store by name; sqlite needs a path for its database file."""
+    if kind == "memory":
+        return MemoryStore()
+    if kind == "hash":
+        return HashStore()
+    if kind == "sqlite":
+        if path is None:
+            raise ValueError("the sqlite store needs a database path")
+        return SqliteStore(path, temporary=True)
+    raise ValueError(f"unknown dedup store {kind!r}, expected one of {', '.join(STORES)}")
+
+
+def describe(store):
+    """Summarise a store's size as bytes per entry."""
+    count = len(store)
+    used = store.bytes_used()
+    per_entry = used / count if count else 0.0
+    where = "on disk" if store.kind == "sqlite" else "in memory"
+    return f"{store.kind} dedup store: {count} entries, {used / 1048576:.1f} MiB {where}, {per_entry:.1f} bytes/entry"
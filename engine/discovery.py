@@ -0,0 +1,320 @@
+"""The discovery stage behind SubdomainTool/subTerra.py: gather subdomains from the discovery tools and probe them."""
+
+import logging
+import os
+import shutil
+import threading
+import time
+
+from engine.batch import DEFAULT_PARALLEL, run_batch
+from engine.bootstrap import ensure_tools, find_go_path, load_cache, tool_env, with_path
+from engine.dedup import SqliteStore
+from engine.process import run_command, stream_lines
+from engine.metrics import METRICS_FILE, Metrics, revision
+from engine.liveness import DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, LivenessChecker, check_hosts
+from engine.scheduler import DEFAULT_JOBS, ScanCancelled, run_tools, until_cancelled
+from engine.state import STATE_FILE, ScanState
+from engine.validation import format_rejections, iter_valid, validate_batch
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def get_go_path():
+    """Retrieve GOPATH, preferring the cached value over running go env."""
+    return find_go_path(load_cache())
+
+def install_golang(env):
+    """Install Go if it is not on env's PATH, and put it there."""
+    if shutil.which("go", path=env["PATH"]) is None:
+        run_command("wget https://golang.org/dl/go1.16.5.linux-amd64.tar.gz", env=env)
+        run_command("tar -C $HOME -xzf go1.16.5.linux-amd64.tar.gz", env=env)
+        env["PATH"] = with_path(env["PATH"], os.path.expanduser("~/go/bin"))
+
+def check_and_install_tools(skip_bootstrap=False):
+    """Check for the presence of required tools and install them if not present."""
+    gopath = get_go_path()
+    os.makedirs(gopath, exist_ok=True)
+    env = tool_env(gopath)
+
+    if not skip_bootstrap:
+        install_golang(env)
+
+    tools_install_commands = {
+        "sublist3r": (
+            "git clone https://github.com/aboul3la/Sublist3r.git && "
+            "cd Sublist3r && pip install -r requirements.txt && python setup.py install --user"
+        ),
+        "amass": "sudo apt-get install amass -y",  # amass needs sudo
+        "assetfinder": "go install github.com/tomnomnom/assetfinder@latest",
+        "findomain": (
+            "curl -LO https://github.com/Findomain/Findomain/releases/latest/download/findomain-linux.zip && "
+            "unzip -o findomain-linux.zip && chmod +x findomain && mv findomain ~/.local/bin/findomain"
+        ),
+        "subfinder": "sudo apt install subfinder -y",  # subfinder needs sudo
+        "dnsenum": "sudo apt-get install dnsenum -y",  # dnsenum needs sudo
+    }
+
+    return ensure_tools(tools_install_commands, env=env, skip_bootstrap=skip_bootstrap, gopath=gopath)
+
+def create_directory(path):
+    """Create a directory if it does not exist, with appropriate permissions."""
+    if not os.path.exists(path):
+        os.makedirs(path, exist_ok=True)
+        logger.info(f"Directory {path} created.")
+    else:
+        logger.info(f"Directory already exists, appending new subdomains...\n")
+
+def parse_tool_output(tool, lines):
+    """Reduce a tool's raw output lines to candidate host names."""
+    if tool == "amass":
+        # amass prints graph lines such as 'www.example.com (FQDN) --> a_record --> 1.2.3.4 (IPAddress)'
+        return (line.split(' ')[0] for line in lines if ' --> ' in line)
+    return lines
+
+def run_tool(tool, command, output_folder, domain, env=None, cancel=None):
+    """Run a specific tool, append its new finds to its own file and return (subdomains, new_count).
+
+    The tool runs with env and is killed if cancel (a threading.Event) is set.
+    """
+    logger.info(f"Running {tool}...")
+    final_file = os.path.join(output_folder, f"{tool}.txt")
+
+    # Ensure that subdomains.txt exists
+    subdomains_file = os.path.join(output_folder, "subdomains.txt")
+    if not os.path.exists(subdomains_file):
+        open(subdomains_file, 'a').close()
+
+    # Ensure that live_subdomains.txt exists
+    live_subdomains_file = os.path.join(output_folder, "live_subdomains.txt")
+    if not os.path.exists(live_subdomains_file):
+        open(live_subdomains_file, 'a').close()
+
+    # Everything the tool has found before is indexed on disk, so a merge costs as much as the new output
+    index_file = os.path.join(output_folder, f"{tool}.index.sqlite")
+    history = os.path.exists(final_file)
+    index = SqliteStore(index_file, fresh=not history, commit_every=None)
+    try:
+        if history and len(index) == 0:
+            # First run with an index: seed it from the existing file once
+            with open(final_file, 'r') as file:
+                index.update(line.strip() for line in file if line.strip())
+            index.commit()
+
+        found = set()
+        new_subdomains = []
+        try:
+            lines = stream_lines(command, timeout=900, env=env, cancel=cancel)
+            for subdomain in iter_valid(parse_tool_output(tool, lines), suffix=domain):
+                found.add(subdomain)
+                if index.add(subdomain):
+                    new_subdomains.append(subdomain)
+
+            # Append only the new entries, in one buffered write, and only then mark them as indexed
+            with open(final_file, 'a') as file:
+                file.write(''.join(f"{subdomain}\n" for subdomain in new_subdomains))
+        except BaseException:
+            # A failed run leaves both the file and the index as they were
+            index.rollback()
+            raise
+        index.commit()
+
+        # Hand back the subdomains this run found, or everything the tool has found if nothing was new
+        if new_subdomains:
+            return found, len(new_subdomains)
+        return set(index), 0
+    finally:
+        index.close()
+
+
+def merge_subdomains(tool, result, total_subdomains):
+    """Add a tool's subdomains to the running total and return how many were new."""
+    subdomains, new_to_tool = result
+    new_count = len(subdomains - total_subdomains)
+    total_subdomains.update(subdomains)
+    logger.info(f"[+] Total Found: {len(total_subdomains)}, New to {tool}: {new_to_tool}")
+    return new_count
+
+
+def check_live_subdomains(subdomains_file, output_file, workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE,
+                          metrics=None, checker=None, probe=None, on_batch=None, on_new_live=None, cancel=None):
+    """Check which subdomains are live using batched, concurrent httpx workers (or a shared checker).
+
+    Live subdomains not already in output_file are appended to it and
+    passed to on_new_live as each batch finishes, before on_batch(batch,
+    live_in_batch) records it. Once cancel is set no more batches are started.
+    """
+    logger.info("Checking which subdomains are live...")
+
+    # Read subdomains from the file
+    start = time.perf_counter()
+    with open(subdomains_file, 'r') as file:
+        subdomains, rejected = validate_batch(file)
+    if metrics is not None:
+        metrics.add("validation", time.perf_counter() - start, len(subdomains) + sum(rejected.values()),
+                    len(subdomains), rejected=dict(rejected))
+    if rejected:
+        logger.info(f"Skipping invalid lines: {format_rejections(rejected)}")
+
+    total_count = len(subdomains)
+    if total_count == 0:
+        logger.info("No subdomains to check.")
+        return set()
+
+    # Read existing live subdomains from the output file
+    existing_live_subdomains = set()
+    if os.path.exists(output_file):
+        with open(output_file, 'r') as file:
+            existing_live_subdomains = set(line.strip() for line in file)
+
+    start = time.perf_counter()
+    lock = threading.Lock()
+    new_live_subdomains = set()
+    with open(output_file, 'a') as file:
+        def batch_done(batch, live_in_batch):
+            # Write the truly new live subdomains before the probes are recorded, so an interrupt
+            # in between cannot leave a host recorded live that the file lacks
+            with lock:
+                new = live_in_batch - existing_live_subdomains - new_live_subdomains
+                new_live_subdomains.update(new)
+                file.write(''.join(f"{subdomain}\n" for subdomain in new))
+                file.flush()
+            if new and on_new_live is not None:
+                on_new_live(new)
+            if on_batch is not None:
+                on_batch(batch, live_in_batch)
+
+        hosts = until_cancelled(subdomains, cancel)
+        if checker is not None:
+            live_subdomains = checker.check(hosts, total=total_count, on_batch=batch_done)
+        else:
+            live_subdomains = check_hosts(hosts, total=total_count, flags="-fc 404", workers=workers,
+                                          batch_size=batch_size, on_batch=batch_done, **(probe or {}))
+    if metrics is not None:
+        metrics.add("liveness", time.perf_counter() - start, total_count, len(live_subdomains))
+
+    logger.info(f"{len(new_live_subdomains)} new live subdomains.")
+    logger.info(f"Live subdomains saved to {output_file}")
+
+    return live_subdomains
+
+
+def ensure_file_exists(file_path):
+    if not os.path.isfile(file_path):
+        open(file_path, 'w').close()
+
+
+def main(domain, workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE, jobs=DEFAULT_JOBS, skip_bootstrap=False,
+         checker=None, tools_ready=None, probe=None, base_dir=None, events=None, progress=True, cancel=None):
+    """Run the discovery tools for domain and probe what they found; returns a summary dict.
+
+    base_dir is the repository root by default, as for the permutation
+    stage; results go to SubdomainTool/results/<domain> under it, where the
+    permutation stage looks for them. events, if given, is called as
+    events(kind, **data) for 'started', 'stage' (each metrics record), 'tool'
+    (as each tool is merged), 'progress' and 'live' (newly live hosts).
+    progress draws httpx progress bars. Setting cancel (a threading.Event)
+    kills the running tools, lets the batches already being probed finish
+    and raises ScanCancelled.
+    """
+    start_time = time.time()
+    emit = events if events is not None else (lambda kind, **data: None)
+    logger.info(f"[*]  Discovery initiated for: {domain}\n")
+
+    base_dir = base_dir or ROOT
+    output_folder = os.path.join(base_dir, f"SubdomainTool/results/{domain}")
+    create_directory(output_folder)
+    metrics = Metrics(os.path.join(output_folder, METRICS_FILE), lambda record: emit("stage", metrics=record),
+                      script="subTerra", domain=domain, revision=revision(base_dir))
+    emit("started", run_id=metrics.run_id)
+
+    if tools_ready is None:
+        with metrics.stage("install") as stage:
+            tools_ready = check_and_install_tools(skip_bootstrap)
+            stage["versions"] = {tool: info["version"] for tool, info in tools_ready.items()}
+
+    # Define the tools and their commands; each writes its finds to stdout, which is parsed as it streams
+    tools = {
+         "amass": f"amass enum -d {domain} -r 8.8.8.8,1.1.1.1,9.9.9.9 -norecursive",
+        "assetfinder": f"assetfinder --subs-only {domain}",
+         "sublist3r": f"sublist3r -n -d {domain}",
+         #"amass": f"amass enum -active -d {domain} -r 8.8.8.8,1.1.1.1,9.9.9.9",
+         "findomain": f"findomain -t {domain} -q",
+         "subfinder": f"subfinder -d {domain} -silent"
+    }
+
+    logger.info("\n[*]  Discovering Subdomains...\n")
+
+    # Run the tools concurrently and merge each one's results as it finishes
+    total_subdomains = set()
+
+    def merge(tool, result):
+        new_count = merge_subdomains(tool, result, total_subdomains)
+        emit("tool", tool=tool, found=len(result[0]), new=new_count)
+        return new_count
+
+    env = tool_env(get_go_path())
+    summaries = run_tools(tools, lambda tool, command: run_tool(tool, command, output_folder, domain, env, cancel),
+                          merge, jobs=jobs)
+    if cancel is not None and cancel.is_set():
+        logger.info(f"Scan of {domain} cancelled while the discovery tools were running.")
+        raise ScanCancelled(domain)
+    for summary in summaries:
+        metrics.add(f"discovery:{summary['tool']}", summary["elapsed"], items_out=summary["new"],
+                    error=summary["error"])
+
+    cumulative_total_subdomains = len(total_subdomains)
+    logger.info(f"Total Subdomains Found by All Tools: {cumulative_total_subdomains}")
+
+    # Save results to a single text file in the output directory
+    all_subdomains_file = os.path.join(output_folder, "subdomains.txt")
+    with metrics.stage("merge", out=len(total_subdomains)):
+        if total_subdomains:
+            with open(all_subdomains_file, "w") as outfile:
+                for subdomain in sorted(total_subdomains):
+                    outfile.write(subdomain + "\n")
+        else:
+            logger.info(f"No new subdomains found by any tool.")
+
+    # Check live subdomains using httpx; every probe is kept in state.db so subterfuge.py need not repeat it
+    live_subdomains_file = os.path.join(output_folder, "live_subdomains.txt")
+    counts = {"probed": 0, "live": 0}
+    with ScanState(os.path.join(output_folder, STATE_FILE), stage="discovery") as state:
+        def probed(hosts, live):
+            state.record_probes(hosts, live)
+            counts["probed"] += len(hosts)
+            counts["live"] += len(live)
+            emit("progress", **counts)
+
+        live_subdomains = check_live_subdomains(all_subdomains_file, live_subdomains_file,
+                                                workers=workers, batch_size=batch_size, metrics=metrics,
+                                                checker=checker, probe=dict(probe or {}, progress=progress, env=env),
+                                                on_batch=probed, on_new_live=lambda hosts: emit("live", hosts=hosts),
+                                                cancel=cancel)
+    if cancel is not None and cancel.is_set():
+        logger.info(f"Scan of {domain} cancelled after probing {counts['probed']} subdomains.")
+        raise ScanCancelled(domain)
+
+    end_time = time.time()
+    runtime = end_time - start_time
+
+    # Print the results
+    with open(live_subdomains_file) as file:
+        live_count = sum(1 for _ in file)
+    metrics.add("total", runtime, items_out=live_count)
+    logger.info(f"Number of live subdomains: {live_count}")
+    logger.info(f"Runtime: {int(runtime // 3600)}:{int((runtime % 3600) // 60)}:{int(runtime % 60)} (hh:mm:ss).")
+    logger.info(f"Metrics appended to {metrics.path}")
+    return {"domain": domain, "run_id": metrics.run_id, "subdomains": cumulative_total_subdomains,
+            "live": len(live_subdomains), "live_total": live_count, "live_file": live_subdomains_file,
+            "runtime": runtime}
+
+
+def batch_main(domains, parallel_domains=DEFAULT_PARALLEL, workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE,
+               skip_bootstrap=False, probe=None, **options):
+    """Scan several domains in one process, sharing the tool bootstrap and httpx pool."""
+    tools_ready = check_and_install_tools(skip_bootstrap)
+    with LivenessChecker(workers=workers, batch_size=batch_size, flags="-fc 404", env=tool_env(get_go_path()),
+                         **(probe or {})) as checker:
+        return run_batch(domains, lambda domain: main(domain, checker=checker, tools_ready=tools_ready, **options),
+                         parallel=parallel_domains)
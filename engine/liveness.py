@@ -0,0 +1,270 @@
+"""Batched, concurrent liveness checking with httpx."""
+
+import itertools
+import logging
+import re
+import shlex
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tqdm import tqdm
+
+from engine.process import StderrTail, kill_group, read_lines, spawn
+from engine.ratecontrol import DEFAULT_MAX_THREADS, AdaptiveController
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_THREADS = 50
+BATCH_TIMEOUT = 900
+
+
+def batched(iterable, size):
+    """Yield lists of up to size items from an iterable without reading it all.
+
+    size may be a callable, asked for the size of each batch in turn.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size() if callable(size) else size))
+        if not batch:
+            return
+        yield batch
+
+
+def normalize_host(line):
+    """Reduce an httpx result line to the bare host name."""
+    host = re.sub(r'^https?://', '', line.strip())
+    return host.split('/', 1)[0]
+
+
+class LivenessChecker:
+    """Probe hosts with a pool of httpx processes fed over stdin.
+
+    Each worker runs one httpx process per batch, so a whole candidate set
+    costs len(hosts) / batch_size process spawns instead of one per host.
+    The checker owns its thread pool and can be reused for several scans.
+    rate_limit caps requests per second across all workers. With adaptive,
+    an AdaptiveController picks the number of running processes, threads
+    per process and batch size, never above workers and max_threads.
+    progress draws a tqdm bar on stderr; env is the environment httpx runs
+    with (this process's by default).
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE,
+                 flags="-mc 200", threads=DEFAULT_THREADS, timeout=BATCH_TIMEOUT,
+                 rate_limit=None, adaptive=False, max_threads=DEFAULT_MAX_THREADS, progress=True, env=None):
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.flags = flags
+        self.threads = threads
+        self.timeout = timeout
+        self.rate_limit = rate_limit
+        self.progress = progress
+        self.env = env
+        self.controller = None
+        if adaptive:
+            self.controller = AdaptiveController(self.workers, max_threads=max_threads, threads=threads,
+                                                 batch_size=batch_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="httpx")
+        self._lock = threading.Lock()
+        self._processes = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        try:
+            if exc_type is not None:
+                self.abort()
+        finally:
+            self.close()
+
+    def close(self):
+        """Wait for the workers to finish.
+
+        A further interrupt while waiting (a second Ctrl-C or SIGTERM) kills
+        the remaining batches instead, but the workers are still waited for,
+        so none of them calls back into a caller that has moved on. The first
+        interrupt is re-raised afterwards.
+        """
+        interrupted = None
+        while True:
+            try:
+                self._executor.shutdown(wait=True)
+                break
+            except BaseException as e:
+                interrupted = interrupted or e
+                self.abort()
+        if interrupted is not None:
+            raise interrupted
+
+    def abort(self):
+        """Drop queued batches and kill running httpx processes, e.g. when the run is interrupted."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            kill_group(process)
+
+    def command(self, threads=None):
+        command = ["httpx", "-silent", "-t", str(threads or self.threads)]
+        if self.rate_limit:
+            # Split the overall ceiling evenly, so it holds however many processes run
+            command += ["-rl", str(max(1, self.rate_limit // self.workers))]
+        return command + shlex.split(self.flags)
+
+    def _in_flight_limit(self):
+        if self.controller is not None:
+            return self.controller.workers
+        return self.workers * 2
+
+    def _next_batch_size(self):
+        if self.controller is not None:
+            return self.controller.batch_size
+        return self.batch_size
+
+    def check(self, hosts, total=None, desc="Checking subdomains", on_live=None, on_batch=None):
+        """Check an iterable of hosts and return the set that responded.
+
+        hosts is consumed lazily; at most two batches per worker are held in
+        memory at once. on_live, if given, is called with each live host as
+        soon as httpx reports it, and on_batch with (batch, live_in_batch)
+        once a batch has been fully probed. If httpx fails part way through a
+        batch, on_batch gets just the hosts it reported live before failing.
+        If check is interrupted, it kills its own batches and waits for them
+        before re-raising, so on_batch is never called after check returns.
+        """
+        live = set()
+        lock = threading.Lock()
+        slots = threading.Condition()
+        in_flight = [0]
+        errors = []
+        stopped = threading.Event()
+        processes = set()
+
+        def finished(future):
+            if not future.cancelled() and future.exception() is not None:
+                errors.append(future.exception())
+            with slots:
+                in_flight[0] -= 1
+                slots.notify_all()
+
+        try:
+            with tqdm(total=total, desc=desc, unit="subdomain", disable=not self.progress) as pbar:
+                for batch in batched(hosts, self._next_batch_size):
+                    # The limit is re-read for every batch, so the controller can widen or narrow it
+                    with slots:
+                        slots.wait_for(lambda: in_flight[0] < self._in_flight_limit())
+                        in_flight[0] += 1
+                    try:
+                        future = self._executor.submit(self._probe_batch, batch, live, lock, pbar, on_live,
+                                                       on_batch, processes, stopped)
+                    except BaseException:
+                        with slots:
+                            in_flight[0] -= 1
+                        raise
+                    future.add_done_callback(finished)
+
+                with slots:
+                    slots.wait_for(lambda: in_flight[0] == 0)
+        except BaseException:
+            self._stop(processes, stopped, slots, in_flight)
+            raise
+
+        for error in errors:
+            logger.error(f"Error running httpx: {error}")
+        if self.controller is not None:
+            logger.info(self.controller.summary())
+        return live
+
+    def _stop(self, processes, stopped, slots, in_flight):
+        """Kill one check's batches and wait until none is left running."""
+        stopped.set()
+        while True:
+            try:
+                with self._lock:
+                    running = list(processes)
+                for process in running:
+                    kill_group(process)
+                with slots:
+                    slots.wait_for(lambda: in_flight[0] == 0)
+                return
+            except BaseException:
+                continue  # interrupted again: keep stopping, the caller re-raises the first interrupt
+
+    def _probe_batch(self, batch, live, lock, pbar, on_live, on_batch, processes, stopped):
+        if stopped.is_set():
+            return
+        threads = self.controller.threads if self.controller is not None else self.threads
+        start = time.monotonic()
+        process = spawn(self.command(threads), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE, text=True, env=self.env)
+        stderr = StderrTail(process.stderr)
+        with self._lock:
+            self._processes.add(process)
+            processes.add(process)
+        if stopped.is_set():
+            kill_group(process)
+        expired = threading.Event()
+        timer = threading.Timer(self.timeout, lambda: (expired.set(), kill_group(process)))
+        timer.start()
+
+        def feed():
+            try:
+                process.stdin.write('\n'.join(batch) + '\n')
+                process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+
+        writer = threading.Thread(target=feed, daemon=True)
+        writer.start()
+
+        seen = set()
+        try:
+            for line in read_lines(process.stdout):
+                host = normalize_host(line)
+                if not host or host in seen:
+                    continue
+                seen.add(host)
+                with lock:
+                    new = host not in live
+                    live.add(host)
+                    pbar.update(1)
+                if new and on_live is not None:
+                    on_live(host)
+            process.wait()
+        finally:
+            timer.cancel()
+            if process.poll() is None:
+                kill_group(process)
+                process.wait()
+            process.stdout.close()
+            writer.join()
+            with self._lock:
+                self._processes.discard(process)
+                processes.discard(process)
+            with lock:
+                pbar.update(max(0, len(batch) - len(seen)))
+
+        if self.controller is not None:
+            self.controller.record(len(batch), time.monotonic() - start, threads,
+                                   timed_out=expired.is_set(), error=process.returncode != 0)
+        if process.returncode != 0:
+            # Keep the hosts httpx did report as live; the rest of the batch stays unprobed
+            if seen and on_batch is not None:
+                on_batch(list(seen), seen)
+            last = stderr.text().splitlines()[-1:]
+            raise RuntimeError(f"httpx exited with status {process.returncode} on a batch of {len(batch)}"
+                               + (f" ({last[0]})" if last else ""))
+        if on_batch is not None:
+            on_batch(batch, seen)
+
+
+def check_hosts(hosts, total=None, desc="Checking subdomains", on_live=None, on_batch=None, **options):
+    """Run a one-off LivenessChecker over hosts."""
+    with LivenessChecker(**options) as checker:
+        return checker.check(hosts, total=total, desc=desc, on_live=on_live, on_batch=on_batch)
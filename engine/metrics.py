@@ -0,0 +1,90 @@
+"""Per-stage timing and throughput metrics written as JSON lines."""
+
+import json
+import os
+import platform
+import resource
+import subprocess
+import time
+import uuid
+from contextlib import contextmanager
+
+METRICS_FILE = "metrics.jsonl"
+
+
+def child_cpu_time():
+    """CPU seconds used so far by child processes that have been waited for."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1048576 if platform.system() == "Darwin" else 1024)
+
+
+def revision(path):
+    """Short git revision of the checkout at path, if there is one."""
+    try:
+        result = subprocess.run(["git", "-C", path, "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() or None
+
+
+class Metrics:
+    """Collect one record per stage and append each to a JSONL file as it completes.
+
+    Every record carries the run id and context (script, domain, revision),
+    wall time, items in and out, throughput, peak RSS so far and the CPU time
+    of child processes reaped during the stage. Stages of the streaming
+    pipeline overlap, so their wall times do not add up to the run time.
+    listener, if given, is called with every record as it is added.
+    """
+
+    def __init__(self, path, listener=None, **context):
+        self.path = path
+        # Several scans can run in one process, so the pid alone does not tell runs apart
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.listener = listener
+        self.context = context
+        self.records = []
+
+    def add(self, stage, wall, items_in=None, items_out=None, child_cpu=None, **extra):
+        count = items_in if items_in is not None else items_out
+        record = {
+            "run_id": self.run_id,
+            **self.context,
+            "stage": stage,
+            "started_at": round(time.time() - wall, 3),
+            "wall_s": round(wall, 3),
+            "in": items_in,
+            "out": items_out,
+            "lines_per_s": round(count / wall, 1) if count is not None and wall > 0 else None,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "child_cpu_s": round(child_cpu, 3) if child_cpu is not None else None,
+            **extra,
+        }
+        self.records.append(record)
+        if self.path is not None:
+            with open(self.path, 'a') as file:
+                file.write(json.dumps(record, sort_keys=True) + '\n')
+        if self.listener is not None:
+            self.listener(record)
+        return record
+
+    @contextmanager
+    def stage(self, name, **extra):
+        """Time a block; the yielded dict takes 'in', 'out' and any extra fields to record."""
+        counts = dict(extra)
+        start = time.perf_counter()
+        children = child_cpu_time()
+        try:
+            yield counts
+        finally:
+            items_in = counts.pop("in", None)
+            items_out = counts.pop("out", None)
+            self.add(name, time.perf_counter() - start, items_in, items_out,
+                     child_cpu=child_cpu_time() - children, **counts)
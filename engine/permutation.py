@@ -0,0 +1,478 @@
+"""The permutation stage behind subterfuge.py: permute known subdomains and probe the candidates."""
+
+import functools
+import logging
+import os
+import subprocess
+import threading
+import time
+from collections import Counter
+
+from engine.assets import cached_hash, load_wordlist
+from engine.batch import DEFAULT_PARALLEL, run_batch
+from engine.bootstrap import ensure_tools, find_go_path, load_cache, tool_env
+from engine.dedup import HashStore, describe, open_store
+from engine.metrics import METRICS_FILE, Metrics, revision
+from engine.liveness import DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, LivenessChecker, check_hosts
+from engine.permute import default_payloads, estimate, generate, load_patterns
+from engine.pipeline import StreamingPipeline
+from engine.resultset import SetWriter, TextAppender
+from engine.resolver import DnsFilter
+from engine.scheduler import DEFAULT_JOBS, ScanCancelled, until_cancelled
+from engine.scoring import CandidateScorer
+from engine.shard import in_shard, launch_local, merge_shards, shard_dir
+from engine.state import STATE_FILE, ScanState, read_probes, seed_key
+from engine.validation import format_rejections
+from engine.yields import DEFAULT_MIN_YIELD, DEFAULT_YIELD_CAP, YieldTracker, format_yields, weak_sources
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GENERATORS = ("alterx", "gotator", "dnsgen", "ripgen", "native")
+DEFAULT_GENERATORS = ("alterx", "gotator", "dnsgen", "ripgen")
+
+def get_go_path():
+    """Retrieve GOPATH, preferring the cached value over running go env."""
+    return find_go_path(load_cache())
+
+def check_and_install_tools(skip_bootstrap=False):
+    """Check for the presence of required tools and install them if not present."""
+    go_path = get_go_path()
+    tools_install_commands = {
+        "alterx": "go install github.com/projectdiscovery/alterx/cmd/alterx@latest",
+        "gotator": "go install github.com/Josue87/gotator@latest",
+        "altdns": "pip install -q py-altdns",
+        "puredns": "go install github.com/d3mondev/puredns/v2@latest",
+        "ripgen": "cargo install ripgen",
+        "lepus": "pip install -q lepus",
+        "dnsgen": "python -m pip install -q dnsgen",
+        "httpx": "go install github.com/projectdiscovery/httpx/cmd/httpx@latest"
+    }
+    return ensure_tools(tools_install_commands, env=tool_env(go_path), skip_bootstrap=skip_bootstrap, gopath=go_path)
+
+def check_live_subdomains(candidates, output_file, total=None, workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE,
+                          on_batch=None, checker=None, probe=None, resumed_live=(), on_new_live=None):
+    """Check which candidates are live using batched, concurrent httpx workers (or a shared checker).
+
+    New live subdomains are appended to output_file as each batch finishes, so
+    an interrupted run keeps what it found, and passed to on_new_live, both
+    before on_batch sees the batch. resumed_live
+    are hosts an interrupted run had already found; they are written first if missing.
+    """
+    # Read previously saved live subdomains
+    previous_live_subdomains = set()
+    if os.path.exists(output_file):
+        with open(output_file, 'r') as file:
+            previous_live_subdomains = {line.strip() for line in file if line.strip()}
+
+    lock = threading.Lock()
+    new_live_subdomains = []
+    with open(output_file, 'a') as file:
+        def append_new(hosts):
+            with lock:
+                new = [host for host in hosts if host not in previous_live_subdomains]
+                previous_live_subdomains.update(new)
+                new_live_subdomains.extend(new)
+                file.write(''.join(f"{host}\n" for host in new))
+                file.flush()
+                if new and on_new_live is not None:
+                    on_new_live(new)
+
+        def batch_done(batch, live_in_batch):
+            # The file comes first: a host recorded live in state.db is skipped by later runs, so it must
+            # already be in the output if an interrupt lands between the two
+            append_new(live_in_batch)
+            if on_batch is not None:
+                on_batch(batch, live_in_batch)
+
+        append_new(resumed_live)
+        if checker is not None:
+            live_subdomains = checker.check(candidates, total=total, on_batch=batch_done)
+        else:
+            live_subdomains = check_hosts(candidates, total=total, flags="-mc 200", workers=workers,
+                                          batch_size=batch_size, on_batch=batch_done, **(probe or {}))
+
+    logger.info(f"{len(new_live_subdomains)} new live subdomains added.")
+    logger.info(f"Live subdomains saved to {output_file}")
+
+    return live_subdomains | set(resumed_live)
+
+
+def count_lines(file_path):
+    return int(subprocess.check_output(['wc', '-l', file_path]).split()[0])
+
+def load_assets(words_file=None, offline=False, base_dir=None):
+    """Open the wordlist (a file or URL) through the asset cache and parse patterns.txt.
+
+    Returns (payloads, patterns, patterns_hash, words_hash); words_hash is None for the built-in words.
+    """
+    patterns_file = os.path.join(base_dir or ROOT, "patterns.txt")
+    words = load_wordlist(words_file, offline=offline) if words_file else None
+    payloads = default_payloads(words)
+    return (payloads, load_patterns(patterns_file, payloads), cached_hash(patterns_file),
+            words.source_hash if words is not None else None)
+
+def main(domain, workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE, jobs=DEFAULT_JOBS, dedup="memory",
+         full=False, recheck_ttl=None, generators=DEFAULT_GENERATORS, words_file=None, max_permutations=None,
+         estimate_only=False, dns=None, skip_bootstrap=False, checker=None, tools_ready=None, assets=None,
+         shard=None, shard_by="candidate", probe=None, resume=False, compact=False, prioritize=False, budget=None,
+         yield_policy="off", min_yield=DEFAULT_MIN_YIELD, yield_cap=DEFAULT_YIELD_CAP, offline=False,
+         base_dir=None, events=None, progress=True, cancel=None):
+    """Permute the domain's known subdomains and probe the candidates; returns a summary dict.
+
+    base_dir is the repository root by default: seeds are read from the
+    discovery stage's SubdomainTool/results/<domain> and results go to
+    results/<domain> under it. events, if given, is called as
+    events(kind, **data) for 'started', 'stage' (each metrics record),
+    'progress', 'live' (newly live hosts) and 'skipped' when there is nothing
+    to scan; None is returned in that case. progress draws httpx progress
+    bars. Setting cancel (a threading.Event) stops the generators, lets the
+    batches already being probed finish and raises ScanCancelled; the run is
+    left interrupted, so resume=True carries on from there.
+    """
+    start_time = time.time()
+    emit = events if events is not None else (lambda kind, **data: None)
+    logger.info(f"Discovery initiated for {domain}\n")
+
+    base_dir = base_dir or ROOT
+    output_folder = os.path.join(base_dir, f"results/{domain}")
+    if shard is not None:
+        # Each shard keeps its own state and partial results; --merge-shards combines them
+        output_folder = shard_dir(output_folder, shard)
+        logger.info(f"Shard {shard[0]}/{shard[1]} (by {shard_by}), writing to {output_folder}")
+    os.makedirs(output_folder, exist_ok=True)
+    
+    subdomain_file = os.path.join(base_dir, f"SubdomainTool/results/{domain}/subdomains.txt")
+    live_subdomains_file = os.path.join(base_dir, f"SubdomainTool/results/{domain}/live_subdomains.txt")
+    patterns_file = os.path.join(base_dir, "patterns.txt")  # Corrected path to the root level
+    metrics = Metrics(os.path.join(output_folder, METRICS_FILE), lambda record: emit("stage", metrics=record),
+                      script="subterfuge", domain=domain,
+                      revision=revision(base_dir), shard=None if shard is None else f"{shard[0]}/{shard[1]}")
+
+    # Check if either subdomains.txt or live_subdomains.txt exists
+    if not os.path.exists(subdomain_file) and not os.path.exists(live_subdomains_file):
+        logger.info(f"No subdomain file found at {subdomain_file} or {live_subdomains_file}")
+        emit("skipped", reason=f"no subdomain file at {subdomain_file} or {live_subdomains_file}")
+        return None
+    
+    # Use the appropriate file for subdomain processing, prioritize live_subdomains_file
+    if os.path.exists(live_subdomains_file):
+        file_to_use = live_subdomains_file
+        logger.info(f"Using live_subdomains_file: {live_subdomains_file}")
+    else:
+        file_to_use = subdomain_file
+        logger.info(f"Using subdomain_file: {subdomain_file}")
+
+    subdomain_count = count_lines(file_to_use)
+    pattern_count = count_lines(patterns_file)
+    logger.info(f"Number of subdomains: {subdomain_count}")
+    logger.info(f"Number of patterns: {pattern_count}\n")
+
+    # Only permute seeds not yet permuted with these patterns, generators and words, and only probe unseen candidates
+    state = ScanState(os.path.join(output_folder, STATE_FILE))
+    try:
+        payloads, patterns, patterns_hash, words_hash = (assets if assets is not None
+                                                         else load_assets(words_file, offline, base_dir))
+    except (OSError, ValueError) as e:
+        logger.error(f"Error loading wordlist: {e}")
+        emit("skipped", reason=f"cannot load wordlist: {e}")
+        state.close()
+        return None
+    with open(file_to_use, 'r') as file:
+        seeds = [line.strip() for line in file if line.strip()]
+    seed_total = len(seeds)
+    if shard is not None and shard_by == "seed":
+        seeds = [seed for seed in seeds if in_shard(seed, shard)]
+    permuted_key = seed_key(patterns_hash, generators, words_hash)
+    seeds_to_permute = seeds if full else state.new_seeds(seeds, permuted_key)
+    logger.info(f"Seeds to permute: {len(seeds_to_permute)} of {len(seeds)}")
+
+    # The yield policy skips or caps generators whose candidates rarely turn up a live host nobody else found
+    history = state.yields()
+    weak = []
+    if yield_policy != "off":
+        weak = weak_sources(history, generators, min_yield=min_yield)
+        if weak:
+            action = "Skipping" if yield_policy == "skip" else f"Capping at {yield_cap} candidates"
+            logger.info(f"{action} {', '.join(weak)}: under {min_yield} unique live hosts per 1k candidates produced")
+        if yield_policy == "skip":
+            weak_templates = weak_sources(history, [pattern.template for pattern in patterns], kind="template",
+                                          min_yield=min_yield)
+            patterns = [pattern for pattern in patterns if pattern.template not in weak_templates]
+            if weak_templates:
+                logger.info(f"Skipping {len(weak_templates)} low-yield patterns in the native generator")
+
+    seed_file = file_to_use
+    if len(seeds_to_permute) != seed_total:
+        seed_file = os.path.join(output_folder, "seeds_delta.txt")
+        with open(seed_file, 'w') as file:
+            file.writelines(f"{seed}\n" for seed in seeds_to_permute)
+
+    # Size the run from the pattern and seed counts before launching anything
+    estimated = estimate(patterns, len(seeds_to_permute), payloads)
+    if max_permutations is not None:
+        estimated = min(estimated, max_permutations)
+    logger.info(f"Estimated pattern permutations: {estimated}")
+    if estimate_only:
+        state.close()
+        if seed_file != file_to_use:
+            os.remove(seed_file)
+        return {"domain": domain, "estimated": estimated, "seeds": len(seeds_to_permute)}
+
+    # Probes are checkpointed in state.db; --resume carries on with an interrupted run
+    resumed = state.interrupted_run() if resume else None
+    if resumed is not None:
+        logger.info(f"Resuming the run started {time.ctime(resumed['started_at'])}: {resumed['probed']} probed, "
+                    f"{resumed['live']} live at the last checkpoint ({time.ctime(resumed['updated_at'])})")
+    elif resume:
+        logger.info("No interrupted run to resume; starting a new one.")
+    elif state.interrupted_run() is not None:
+        logger.info("An earlier run was interrupted; rerun with --resume to continue it from its last checkpoint.")
+    run = state.begin_run(metrics.run_id, resumed)
+    emit("started", run_id=metrics.run_id, seeds=len(seeds_to_permute), estimated=estimated,
+         resumed=resumed is not None)
+
+    # Hosts the discovery stage already probed join the index, so their re-emitted names are not probed again
+    discovery_state_file = os.path.join(base_dir, f"SubdomainTool/results/{domain}/{STATE_FILE}")
+    if os.path.exists(discovery_state_file):
+        imported = state.import_probes(read_probes(discovery_state_file), "discovery")
+    elif file_to_use == live_subdomains_file:
+        # Discovery runs from before its state.db only left live hosts, stamped with the file's mtime
+        stamp = os.path.getmtime(file_to_use)
+        imported = state.import_probes(((seed, stamp, 1) for seed in seeds), "discovery")
+    else:
+        imported = 0
+    logger.info(f"Imported {imported} new or updated probes from the discovery stage")
+
+    if tools_ready is None:
+        with metrics.stage("install") as stage:
+            tools_ready = check_and_install_tools(skip_bootstrap)
+            stage["versions"] = {tool: info["version"] for tool, info in tools_ready.items()}
+
+    env = tool_env(get_go_path())
+    ttl = recheck_ttl * 3600 if recheck_ttl is not None else None
+
+    native_counted = Counter()
+
+    def unprobed(host):
+        counted = full or state.known(host, ttl) is None
+        native_counted["new"] += counted
+        return counted
+
+    # Generators write to stdout so their output can be streamed straight into the probe queue
+    tools = {}
+    if seeds_to_permute:
+        tools = {
+            "alterx": f"alterx -silent -l {seed_file} -p {patterns_file} -ms 15",
+            "gotator": f"gotator -sub {seed_file} -perm {patterns_file} -depth 0 -numbers 0 -mindup -adv -md",
+            "dnsgen": f"dnsgen {seed_file}",
+            "ripgen": f"ripgen -d {seed_file}",
+            #"lepus": f"lepus.py --permutate -pw {patterns_file} {seed_file}"
+            "native": generate(seeds_to_permute, patterns, payloads, root=domain, limit=max_permutations,
+                               seen=HashStore(), with_origin=True, counts=unprobed if max_permutations else None),
+        }
+        tools = {tool: source for tool, source in tools.items()
+                 if tool in generators and not (yield_policy == "skip" and tool in weak)}
+    caps = {tool: yield_cap for tool in weak} if yield_policy == "cap" else {}
+    if ttl is not None:
+        tools["recheck"] = state.stale_hosts(ttl)
+    known_skipped = Counter()
+    known_lock = threading.Lock()
+
+    def known_host(host):
+        known = state.known(host, ttl)
+        if known is not None:
+            with known_lock:
+                known_skipped[known] += 1
+        return known
+
+    if full:
+        # A resumed --full run still skips whatever it probed before the interruption
+        skip = None if resumed is None else (lambda host: state.probed_since(host, run["started_at"]))
+    else:
+        skip = lambda host: known_host(host) is not None
+    keep = None
+    if shard is not None and shard_by == "candidate":
+        keep = lambda host: in_shard(host, shard)
+
+    # With a budget or --prioritize, candidates are scored and probed best first instead of as they stream in
+    scorer = None
+    if prioritize or budget is not None:
+        live_seeds = seeds if file_to_use == live_subdomains_file else []
+        scorer = CandidateScorer(history, live_seeds + state.live_hosts(), budget)
+
+    # Every candidate is traced back to its generator and pattern through the probe
+    tracker = YieldTracker()
+
+    def accepted(host, tool, template, seed):
+        tracker.accepted(host, tool, template)
+        if scorer is not None:
+            scorer.add(host, tool, template, seed)
+
+    def probed(hosts, live_hosts):
+        state.record_probes(hosts, live_hosts)
+        tracker.probed(hosts, live_hosts)
+        emit("progress", probed=run["probed"], live=run["live"])
+
+    total_subdomains = open_store(dedup, os.path.join(output_folder, "dedup.sqlite"))
+
+    # Unique, valid permutations are added to all_permutations.txt (or .sset) as they stream through, so it
+    # holds every candidate of every run
+    all_permutations_file = os.path.join(output_folder, "all_permutations.sset" if compact else "all_permutations.txt")
+    live_subdomains_file = os.path.join(output_folder, "live_subdomains.txt")
+    with (SetWriter(all_permutations_file, update=True) if compact
+          else TextAppender(all_permutations_file)) as outfile:
+        pipeline = StreamingPipeline(tools, total_subdomains, jobs=jobs, timeout=1800, sink=outfile, skip=skip,
+                                     keep=keep, on_accept=accepted, on_duplicate=tracker.duplicate, caps=caps,
+                                     env=env)
+        candidates = until_cancelled(pipeline.start(), cancel)
+        ranked = None
+        if scorer is not None:
+            with metrics.stage("scoring") as stage:
+                for _ in candidates:
+                    pass
+                ranked = scorer.ranked()
+                stage["in"], stage["out"] = scorer.seen, len(ranked)
+                stage["budget"] = budget
+            logger.info(f"Ranked {scorer.seen} candidates; probing the top {len(ranked)} in priority order.")
+            candidates = until_cancelled((host for host, _, _ in ranked), cancel)
+        dns_filter = None
+        if dns is not None:
+            # Names that do not resolve are recorded as probed-dead and never reach httpx
+            dns_filter = DnsFilter(on_drop=lambda hosts: probed(hosts, ()), **dns)
+            candidates = dns_filter.filter(candidates)
+        try:
+            # Check live subdomains using httpx while the generators are still running
+            with metrics.stage("liveness") as stage:
+                live = check_live_subdomains(candidates, live_subdomains_file, workers=workers,
+                                             batch_size=batch_size, on_batch=probed, checker=checker,
+                                             probe=dict(probe or {}, progress=progress, env=env),
+                                             resumed_live=state.live_since(run["started_at"]) if resumed else (),
+                                             on_new_live=lambda hosts: emit("live", hosts=hosts))
+                stage["out"] = len(live)
+                stage["in"] = (dns_filter.stats["resolved"] + dns_filter.stats["error"] if dns_filter is not None
+                               else len(ranked) if ranked is not None else pipeline.accepted - pipeline.skipped)
+        finally:
+            try:
+                pipeline.close()
+            finally:
+                # Checkpoint the probes even if a second signal cuts the generators' shutdown short
+                state.commit()
+        if dns_filter is not None:
+            logger.info(dns_filter.summary())
+
+    if cancel is not None and cancel.is_set():
+        # The run stays interrupted in state.db, so --resume picks it up from the last checkpoint
+        state.close()
+        total_subdomains.close()
+        if seed_file != file_to_use:
+            os.remove(seed_file)
+        logger.info(f"Scan of {domain} cancelled after probing {run['probed']} candidates.")
+        raise ScanCancelled(domain)
+
+    yields = tracker.results()
+    state.record_yields(yields)
+    logger.info(format_yields(yields))
+
+    # Generation, validation, dedup, DNS and probing overlap, so each stage's wall time is its own span
+    for summary in pipeline.summaries:
+        counts = yields.get(("tool", summary["tool"]), {})
+        metrics.add(f"generate:{summary['tool']}", summary["elapsed"], summary["lines"], summary["new"],
+                    error=summary["error"], live=counts.get("live", 0), unique_live=counts.get("unique_live", 0))
+    metrics.add("validation", pipeline.elapsed or 0.0, pipeline.lines, pipeline.valid,
+                rejected=dict(pipeline.rejected))
+    metrics.add("merge", pipeline.elapsed or 0.0, pipeline.valid, pipeline.accepted - pipeline.skipped,
+                unique=pipeline.accepted, skipped=pipeline.skipped, other_shards=pipeline.filtered,
+                skipped_known={f"{stage}:{'live' if live else 'dead'}": count
+                               for (stage, live), count in known_skipped.items()},
+                bytes_per_entry=round(total_subdomains.bytes_used() / max(1, len(total_subdomains)), 1))
+    if dns_filter is not None:
+        metrics.add("dns", dns_filter.elapsed or 0.0, pipeline.accepted - pipeline.skipped,
+                    dns_filter.stats["resolved"] + dns_filter.stats["error"], resolved=dns_filter.stats["resolved"],
+                    nxdomain=dns_filter.stats["nxdomain"], wildcard=dns_filter.stats["wildcard"],
+                    unresolved=dns_filter.stats["error"])
+
+    # Seeds whose candidates were deferred by the budget or cut off by --max-permutations are permuted
+    # again next run, so the rest get generated and probed
+    deferred = scorer.seen - len(ranked) if scorer is not None else 0
+    truncated = max_permutations is not None and native_counted["new"] >= max_permutations
+    if truncated:
+        logger.info(f"The native generator stopped at --max-permutations {max_permutations}; "
+                    f"its seeds will be permuted again next run.")
+    if not any(summary["error"] for summary in pipeline.summaries) and not deferred and not truncated:
+        state.mark_permuted(seeds_to_permute, permuted_key)
+    state.finish_run()
+    state.close()
+    if seed_file != file_to_use:
+        os.remove(seed_file)
+
+    total_permutations = len(total_subdomains)
+    logger.info(f"Validated {total_permutations} unique permutations, {format_rejections(pipeline.rejected)}.")
+    logger.info(f"Added {outfile.count - outfile.existing} new permutations to {all_permutations_file}, "
+                f"{outfile.count} in total.")
+    logger.info(f"Skipped {pipeline.skipped} candidates already probed{' within the recheck TTL' if ttl else ''}.")
+    if known_skipped:
+        logger.info(f"Known hosts skipped: {known_skipped[('discovery', True)]} live and "
+                    f"{known_skipped[('discovery', False)]} dead from discovery, "
+                    f"{known_skipped[('permutation', True)]} live and {known_skipped[('permutation', False)]} dead "
+                    f"from earlier permutation runs.")
+    if deferred:
+        logger.info(f"Deferred {deferred} lower-scoring candidates to a later run.")
+    if keep is not None:
+        logger.info(f"Left {pipeline.filtered} candidates to the other shards.")
+    logger.info(describe(total_subdomains))
+    total_subdomains.close()
+
+    end_time = time.time()
+    runtime = end_time - start_time
+    
+    # Print the results
+    with open(live_subdomains_file) as file:
+        total_live_count = sum(1 for _ in file)
+    metrics.add("total", runtime, items_out=total_live_count)
+    logger.info(f"\n[+] Total Live Subdomains: {total_live_count}")
+    logger.info(f"Runtime: {int(runtime // 3600)}:{int((runtime % 3600) // 60)}:{int(runtime % 60)} (hh:mm:ss).")
+    logger.info(f"Metrics appended to {metrics.path}")
+    return {"domain": domain, "run_id": metrics.run_id, "live": len(live), "live_total": total_live_count,
+            "live_file": live_subdomains_file, "permutations": total_permutations, "skipped": pipeline.skipped,
+            "deferred": deferred, "runtime": runtime}
+
+
+def batch_main(domains, parallel_domains=DEFAULT_PARALLEL, workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE,
+               words_file=None, skip_bootstrap=False, probe=None, **options):
+    """Scan several domains in one process, sharing the tool bootstrap, parsed patterns and httpx pool."""
+    tools_ready = {} if options.get("estimate_only") else check_and_install_tools(skip_bootstrap)
+    assets = load_assets(words_file, options.get("offline", False), options.get("base_dir"))
+    with LivenessChecker(workers=workers, batch_size=batch_size, flags="-mc 200", env=tool_env(get_go_path()),
+                         **(probe or {})) as checker:
+        return run_batch(domains, lambda domain: main(domain, words_file=words_file, checker=checker,
+                                                      tools_ready=tools_ready, assets=assets, **options),
+                         parallel=parallel_domains)
+
+
+def _scan_shard(shard, domain, options):
+    main(domain, shard=shard, **options)
+
+
+def shard_main(domain, shards, skip_bootstrap=False, **options):
+    """Scan one domain as shards local processes, then merge their live results."""
+    tools_ready = {} if options.get("estimate_only") else check_and_install_tools(skip_bootstrap)
+    # Callbacks cannot cross into the shard processes, so shards only report through their logs and metrics
+    errors = launch_local(shards, functools.partial(_scan_shard, domain=domain,
+                                                    options=dict(options, tools_ready=tools_ready, events=None)))
+    if not options.get("estimate_only"):
+        merge_main(domain, options.get("base_dir"))
+    return errors
+
+
+def merge_main(domain, base_dir=None):
+    """Combine results/<domain>/shards/*/live_subdomains.txt into results/<domain>/live_subdomains.txt."""
+    output_folder = os.path.join(base_dir or ROOT, f"results/{domain}")
+    live_subdomains_file = os.path.join(output_folder, "live_subdomains.txt")
+    total, new, missing = merge_shards(output_folder, live_subdomains_file)
+    if missing:
+        logger.info(f"Shards without results yet: {', '.join(missing)}")
+    logger.info(f"Merged shard results: {new} new live subdomains, {total} in {live_subdomains_file}")
+    return total, new, missing
+
+
@@ -0,0 +1,152 @@
+"""In-process permutation generator driven by patterns.txt templates.
+
+Templates use the same {{placeholder}} syntax as alterx. {{sub}} is the
+seed's leftmost label and {{suffix}} the rest of the seed; every other
+placeholder is expanded from a payload list.
+"""
+
+import datetime
+import itertools
+import logging
+import re
+
+from engine.dedup import MemoryStore
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = re.compile(r'\{\{(\w+)\}\}')
+SEED_PLACEHOLDERS = ("sub", "suffix")
+WORD_CHUNK = 4096
+
+DEFAULT_WORDS = [
+    "admin", "api", "app", "auth", "beta", "cdn", "ci", "corp", "db", "demo", "dev", "docs",
+    "git", "internal", "jenkins", "lab", "m", "mail", "new", "old", "portal", "preprod", "prod",
+    "qa", "sandbox", "stage", "staging", "static", "test", "uat", "v1", "v2", "vpn", "www",
+]
+DEFAULT_REGIONS = [
+    "us-east-1", "us-east-2", "us-west-1", "us-west-2", "eu-west-1", "eu-west-2",
+    "eu-central-1", "ap-south-1", "ap-southeast-1", "ap-southeast-2", "ap-northeast-1",
+    "sa-east-1", "ca-central-1", "us", "eu", "ap",
+]
+
+
+def default_payloads(words=None):
+    """Payload lists for every placeholder patterns.txt uses; words may be a memory-mapped WordList."""
+    year = datetime.date.today().year
+    return {
+        "word": words if words is not None else list(DEFAULT_WORDS),
+        "region": list(DEFAULT_REGIONS),
+        "year": [str(year - offset) for offset in range(3)],
+        "number": [str(number) for number in range(10)],
+    }
+
+
+def _product(sequences):
+    """itertools.product that decodes a memory-mapped wordlist WORD_CHUNK words at a time.
+
+    Lists go straight to itertools.product. A mapped wordlist is walked in
+    chunks, each chunk combined with the other payloads in turn, instead of
+    being copied whole into a tuple.
+    """
+    for index, sequence in enumerate(sequences):
+        if not isinstance(sequence, (list, tuple)):
+            for start in range(0, len(sequence), WORD_CHUNK):
+                chunk = sequence[start:start + WORD_CHUNK]
+                yield from _product(sequences[:index] + [chunk] + sequences[index + 1:])
+            return
+    yield from itertools.product(*sequences)
+
+
+class Pattern:
+    """One patterns.txt template split into literal text and placeholders."""
+
+    def __init__(self, template):
+        self.template = template
+        self.parts = PLACEHOLDER.split(template)
+        # Odd indices of parts are placeholder names
+        self.placeholders = self.parts[1::2]
+        self.payload_names = [name for name in dict.fromkeys(self.placeholders) if name not in SEED_PLACEHOLDERS]
+
+    def __repr__(self):
+        return f"Pattern({self.template!r})"
+
+    def combinations(self, payloads):
+        """Number of outputs per seed."""
+        count = 1
+        for name in self.payload_names:
+            count *= len(payloads[name])
+        return count
+
+    def expand(self, sub, suffix, payloads):
+        values = {"sub": sub, "suffix": suffix}
+        sequences = [payloads[name] for name in self.payload_names]
+        if all(isinstance(sequence, (list, tuple)) for sequence in sequences):
+            combinations = itertools.product(*sequences)
+        else:
+            combinations = _product(sequences)
+        for combination in combinations:
+            values.update(zip(self.payload_names, combination))
+            parts = list(self.parts)
+            for index in range(1, len(parts), 2):
+                parts[index] = values[parts[index]]
+            yield ''.join(parts)
+
+
+def load_patterns(path, payloads=None):
+    """Parse patterns.txt, skipping blanks, comments and templates with unknown placeholders."""
+    payloads = payloads if payloads is not None else default_payloads()
+    patterns = []
+    with open(path, 'r') as file:
+        for line in file:
+            template = line.strip()
+            if not template or template.startswith('#'):
+                continue
+            pattern = Pattern(template)
+            unknown = [name for name in pattern.payload_names if name not in payloads]
+            if unknown:
+                logger.info(f"Skipping pattern {template}: unknown placeholder {', '.join(unknown)}")
+                continue
+            patterns.append(pattern)
+    return patterns
+
+
+def split_seed(seed, root=None):
+    """Split a seed into (sub, suffix), or None if it has nothing to permute."""
+    if root is not None and (seed == root or not seed.endswith('.' + root)):
+        return None
+    sub, dot, suffix = seed.partition('.')
+    if not dot or not sub or '.' not in suffix:
+        return None
+    return sub, suffix
+
+
+def estimate(patterns, seed_count, payloads=None):
+    """Upper bound on output size before deduplication."""
+    payloads = payloads if payloads is not None else default_payloads()
+    return seed_count * sum(pattern.combinations(payloads) for pattern in patterns)
+
+
+def generate(seeds, patterns, payloads=None, root=None, limit=None, seen=None, with_origin=False, counts=None):
+    """Lazily yield unique permutations of seeds, stopping after limit outputs.
+
+    seen is an engine.dedup store used to drop duplicates at the source; it
+    defaults to an in-memory set. counts(candidate), if given, decides which
+    outputs count towards limit, so a rerun can get past ones already
+    probed. With with_origin, yields (candidate, template, seed) naming the
+    patterns.txt line and the seed that produced each one.
+    """
+    payloads = payloads if payloads is not None else default_payloads()
+    seen = seen if seen is not None else MemoryStore()
+    split_seeds = [(seed, parts) for seed, parts in ((seed, split_seed(seed, root)) for seed in seeds)
+                   if parts is not None]
+    produced = 0
+    for pattern in patterns:
+        for seed, (sub, suffix) in split_seeds:
+            for candidate in pattern.expand(sub, suffix, payloads):
+                if not seen.add(candidate):
+                    continue
+                yield (candidate, pattern.template, seed) if with_origin else candidate
+                if counts is None or counts(candidate):
+                    produced += 1
+                if limit is not None and produced >= limit:
+                    return
@@ -0,0 +1,283 @@
+"""Stream generator output through dedup and validation into the liveness stage."""
+
+import logging
+import queue
+import subprocess
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from engine.process import StderrTail, kill_group, read_lines, spawn
+from engine.scheduler import DEFAULT_JOBS, print_summary
+from engine.validation import rejection_reason
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 10000
+_DONE = object()
+
+
+class _ToolRun:
+    """Bookkeeping for one generator process."""
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.start = time.monotonic()
+        self.blocked = 0.0
+        self.blocked_since = None
+        self.timed_out = False
+        self.capped = False
+        self.stopped = False
+        self.lines = 0
+
+    def active_time(self):
+        """Seconds the generator has run, excluding time spent waiting on a full queue."""
+        blocked = self.blocked
+        if self.blocked_since is not None:
+            blocked += time.monotonic() - self.blocked_since
+        return time.monotonic() - self.start - blocked
+
+
+class StreamingPipeline:
+    """Run generator commands and stream their unique, valid lines to a consumer.
+
+    Each command's stdout is read line by line; lines are validated (and
+    optionally restricted to names ending in suffix), checked against seen
+    and put on a bounded queue, so probing can start while the generators
+    are still running and no file ever holds the raw output.
+    seen is any engine.dedup store. tools maps a name to either a shell
+    command or an in-process iterable of lines. Valid lines for which
+    keep(host) is false (another shard's candidates) are dropped before
+    dedup. Unique candidates for which skip(host) is true are recorded but
+    not queued. In-process sources may yield (line, template) or (line,
+    template, seed) tuples; every queued candidate is passed to
+    on_accept(host, tool, template, seed), so callers can tell which
+    generator, pattern and seed produced it; valid lines that were already
+    seen go to on_duplicate(host, tool, template) instead. caps maps
+    a tool to the most new candidates it may add before it is stopped.
+    Commands run with env (this process's environment by default).
+
+    Iterating the pipeline yields candidates until every generator is done.
+    If a source, sink, store or callback raises, the other generators are
+    stopped and the error is re-raised to the consumer. Time a generator
+    spends blocked on a full queue does not count towards its timeout.
+    """
+
+    def __init__(self, tools, seen, jobs=DEFAULT_JOBS, timeout=1800,
+                 queue_size=DEFAULT_QUEUE_SIZE, sink=None, suffix=None, skip=None, keep=None,
+                 on_accept=None, on_duplicate=None, caps=None, env=None):
+        self.tools = tools
+        self.seen = seen
+        self.suffix = suffix
+        self.skip = skip
+        self.keep = keep
+        self.on_accept = on_accept
+        self.on_duplicate = on_duplicate
+        self.caps = caps or {}
+        self.env = env
+        self.jobs = max(1, jobs)
+        self.timeout = timeout
+        self.sink = sink
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.summaries = []
+        self.accepted = 0
+        self.lines = 0
+        self.valid = 0
+        self.rejected = Counter()
+        self.skipped = 0
+        self.filtered = 0
+        self._lock = threading.Lock()
+        self._processes = set()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.elapsed = None
+        self.error = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="pipeline", daemon=True)
+        self._thread.start()
+        return self
+
+    def __iter__(self):
+        if self._thread is None:
+            self.start()
+        while True:
+            item = self.queue.get()
+            if item is _DONE:
+                if self.error is not None:
+                    raise self.error
+                return
+            yield item
+
+    def _stop_generators(self):
+        self._stopped.set()
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            kill_group(process)
+
+    def close(self):
+        """Stop all generators and unblock any producer waiting on the queue."""
+        self._stop_generators()
+        while self._thread is not None and self._thread.is_alive():
+            try:
+                self.queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    def _run(self):
+        start = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="generator") as executor:
+                futures = [executor.submit(self._run_tool, tool, source) for tool, source in self.tools.items()]
+                for future in futures:
+                    try:
+                        self.summaries.append(future.result())
+                    except BaseException:
+                        # Stop the rest so the pool can shut down, then report the error to the consumer
+                        self._stop_generators()
+                        raise
+            if self.sink is not None:
+                self.sink.flush()
+            self.elapsed = time.monotonic() - start
+            print_summary(self.summaries)
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.queue.put(_DONE)
+
+    def _put(self, run, host):
+        run.blocked_since = time.monotonic()
+        while not self._stopped.is_set():
+            try:
+                self.queue.put(host, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+        else:
+            run.stopped = True
+        run.blocked += time.monotonic() - run.blocked_since
+        run.blocked_since = None
+
+    def _watch(self, run, process, done):
+        # Sleep until the timeout could next be due; time blocked on the queue pushes it back
+        while not done.wait(max(0.0, self.timeout - run.active_time())):
+            if run.active_time() > self.timeout:
+                run.timed_out = True
+                kill_group(process)
+                return
+
+    def _consume(self, run, lines):
+        """Validate, dedup and enqueue lines; return how many were new."""
+        new_count = 0
+        cap = self.caps.get(run.tool)
+        for line in lines:
+            if self._stopped.is_set():
+                run.stopped = True
+                break
+            template = seed = None
+            if isinstance(line, tuple):
+                line, template, seed = line if len(line) == 3 else (*line, None)
+            host = line.strip()
+            if not host:
+                continue
+            run.lines += 1
+            reason = rejection_reason(host, self.suffix)
+            if reason is not None:
+                with self._lock:
+                    self.rejected[reason] += 1
+                continue
+            if self.keep is not None and not self.keep(host):
+                with self._lock:
+                    self.filtered += 1
+                continue
+            if cap is not None and new_count >= cap:
+                run.capped = True
+                break
+            with self._lock:
+                self.valid += 1
+                new = self.seen.add(host)
+                if new:
+                    self.accepted += 1
+                    if self.sink is not None:
+                        self.sink.write(host + '\n')
+            if not new:
+                if self.on_duplicate is not None:
+                    self.on_duplicate(host, run.tool, template)
+                continue
+            new_count += 1
+            if self.skip is not None and self.skip(host):
+                with self._lock:
+                    self.skipped += 1
+                continue
+            if self.on_accept is not None:
+                self.on_accept(host, run.tool, template, seed)
+            self._put(run, host)
+        return new_count
+
+    def _finish(self, run, new_count, error):
+        if run.stopped:
+            # Its output is incomplete, so callers must not treat its seeds as done
+            error = "stopped before it finished"
+        logger.info(f"{run.tool} {'stopped' if run.stopped else 'finished'} - {new_count} new permutations added "
+                    f"- Total Permutations: {self.accepted}")
+        with self._lock:
+            self.lines += run.lines
+        return {"tool": run.tool, "elapsed": time.monotonic() - run.start, "lines": run.lines,
+                "new": new_count, "error": error, "stopped": run.stopped}
+
+    def _run_tool(self, tool, source):
+        logger.info(f"Running {tool}...")
+        run = _ToolRun(tool)
+        if not isinstance(source, str):
+            # In-process sources are plain iterables of lines
+            return self._finish(run, self._consume(run, source), None)
+
+        error = None
+        try:
+            process = spawn(source, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            env=self.env)
+        except OSError as e:
+            logger.error(f"Error running {tool}: {e}")
+            return self._finish(run, 0, str(e))
+
+        with self._lock:
+            self._processes.add(process)
+        if self._stopped.is_set():
+            # Stopped while this one was starting, after the others were killed
+            kill_group(process)
+        done = threading.Event()
+        watchdog = threading.Thread(target=self._watch, args=(run, process, done), daemon=True)
+        watchdog.start()
+        stderr = StderrTail(process.stderr)
+
+        try:
+            new_count = self._consume(run, read_lines(process.stdout))
+        except BaseException:
+            kill_group(process)
+            raise
+        finally:
+            if run.capped:
+                kill_group(process)
+            process.wait()
+            done.set()
+            process.stdout.close()
+            watchdog.join()
+            with self._lock:
+                self._processes.discard(process)
+
+        if run.timed_out:
+            error = f"timeout after {self.timeout}s"
+            logger.warning(f"Timeout running {tool}: {error}")
+        elif run.capped:
+            logger.info(f"Stopped {tool} at its cap of {self.caps[tool]} new candidates")
+        elif process.returncode != 0 and self._stopped.is_set():
+            run.stopped = True
+        elif process.returncode != 0:
+            error = f"exit status {process.returncode}"
+            last = stderr.text().splitlines()[-1:]
+            if last:
+                error += f" ({last[0]})"
+            logger.error(f"Error running {tool}: {error}")
+        return self._finish(run, new_count, error)
@@ -0,0 +1,131 @@
+"""Run child processes with streamed output, a bounded stderr tail and process-group kills."""
+
+import os
+import signal
+import subprocess
+import threading
+from collections import deque
+
+STDERR_LINES = 50
+MAX_LINE = 65536  # longer lines are handed on in pieces instead of being buffered whole
+CHUNK_LINES = 1000  # lines gathered before each write to an output file
+
+
+class CommandError(subprocess.CalledProcessError):
+    """A command exited non-zero; str() ends with the last line of its stderr."""
+
+    def __str__(self):
+        message = super().__str__()
+        last = self.stderr.strip().splitlines()[-1:] if self.stderr else []
+        return f"{message} ({last[0]})" if last else message
+
+
+class StderrTail:
+    """Drain a pipe on its own thread, keeping only its last lines for error reports."""
+
+    def __init__(self, pipe, lines=STDERR_LINES):
+        self.lines = deque(maxlen=lines)
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._drain, args=(pipe,), daemon=True)
+        self._thread.start()
+
+    def _drain(self, pipe):
+        with pipe:
+            for line in read_lines(pipe):
+                if len(self.lines) == self.lines.maxlen:
+                    self.dropped += 1
+                self.lines.append(line)
+
+    def text(self):
+        self._thread.join(timeout=5)
+        lines = list(self.lines)
+        if self.dropped:
+            lines.insert(0, f"[{self.dropped} earlier lines dropped]")
+        return '\n'.join(lines)
+
+
+def read_lines(pipe):
+    """Yield a pipe's lines without their newline, at most MAX_LINE characters at a time."""
+    while True:
+        line = pipe.readline(MAX_LINE)
+        if not line:
+            return
+        if isinstance(line, bytes):
+            line = line.decode(errors='replace')
+        yield line.rstrip('\r\n')
+
+
+def spawn(command, **options):
+    """Popen command (a shell string or an argv list) as the leader of a new process group."""
+    return subprocess.Popen(command, shell=isinstance(command, str), start_new_session=True, **options)
+
+
+def kill_group(process):
+    """Kill process and everything it started, so no children outlive it."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        process.kill()
+
+
+def _kill_on_cancel(process, cancel):
+    while process.poll() is None:
+        if cancel.wait(0.5):
+            kill_group(process)
+            return
+
+
+def stream_lines(command, timeout=None, env=None, cancel=None):
+    """Yield a shell command's stdout line by line as it is produced.
+
+    stderr is kept in a capped StderrTail. The whole process group is killed
+    when timeout seconds pass, when cancel (a threading.Event) is set, or
+    when the consumer stops iterating early. Raises subprocess.TimeoutExpired
+    or CommandError once the output ends.
+    """
+    process = spawn(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+    stderr = StderrTail(process.stderr)
+    expired = threading.Event()
+    timer = None
+    if timeout is not None:
+        timer = threading.Timer(timeout, lambda: (expired.set(), kill_group(process)))
+        timer.daemon = True
+        timer.start()
+    if cancel is not None:
+        threading.Thread(target=_kill_on_cancel, args=(process, cancel), daemon=True).start()
+    try:
+        yield from read_lines(process.stdout)
+        process.wait()
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if process.poll() is None:
+            kill_group(process)
+            process.wait()
+        process.stdout.close()
+    if expired.is_set():
+        raise subprocess.TimeoutExpired(command, timeout, stderr=stderr.text())
+    if process.returncode != 0:
+        raise CommandError(process.returncode, command, stderr=stderr.text())
+
+
+def run_command(command, env=None, timeout=300, output=None):
+    """Run a shell command, streaming its stdout to output, and return how many lines it printed.
+
+    output is a callable taking each line, or a text file written in chunks
+    of CHUNK_LINES; by default the output is discarded.
+    """
+    count = 0
+    chunk = []
+    for line in stream_lines(command, timeout=timeout, env=env):
+        count += 1
+        if callable(output):
+            output(line)
+        elif output is not None:
+            chunk.append(f"{line}\n")
+            if len(chunk) >= CHUNK_LINES:
+                output.write(''.join(chunk))
+                chunk = []
+    if chunk:
+        output.write(''.join(chunk))
+    return count
@@ -0,0 +1,83 @@
+"""Adaptive concurrency and batch sizing for the httpx liveness stage."""
+
+import math
+import threading
+from collections import Counter
+
+DEFAULT_MAX_THREADS = 150
+MIN_THREADS = 5
+MIN_BATCH_SIZE = 50
+MAX_BATCH_SIZE = 5000
+TARGET_BATCH_SECONDS = 30
+SLOWDOWN = 1.5  # latency over baseline that counts as saturation
+SMOOTHING = 0.3
+
+
+class AdaptiveController:
+    """Tune httpx processes, threads per process and batch size from what each batch shows.
+
+    After every batch the controller sees how many hosts it held, how long it
+    took and whether httpx was killed by the batch timeout or exited with an
+    error. Timeouts and errors halve the concurrency; a smoothed per-round
+    latency well above the best seen so far (the target is saturating) cuts
+    it by a quarter; otherwise processes and threads grow a step at a time.
+    Batches are sized to take about TARGET_BATCH_SECONDS at the measured rate.
+    max_workers and max_threads are hard ceilings set by the operator and are
+    never exceeded; the controller only moves below them.
+    """
+
+    def __init__(self, max_workers, max_threads=DEFAULT_MAX_THREADS, threads=None, batch_size=None,
+                 max_batch_size=MAX_BATCH_SIZE, target_seconds=TARGET_BATCH_SECONDS):
+        self.max_workers = max(1, max_workers)
+        self.max_threads = max(MIN_THREADS, max_threads)
+        self.max_batch_size = max(MIN_BATCH_SIZE, max_batch_size)
+        self.target_seconds = target_seconds
+        # Start from the fixed settings and only back off once the target shows strain
+        self.workers = self.max_workers
+        self.threads = min(threads or self.max_threads // 2, self.max_threads)
+        self.batch_size = min(max(batch_size or MIN_BATCH_SIZE, MIN_BATCH_SIZE), self.max_batch_size)
+        self.latency = None
+        self.baseline = None
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, hosts, elapsed, threads, timed_out=False, error=False):
+        """Feed back one finished batch probed with the given threads per process."""
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["hosts"] += hosts
+            if timed_out or error:
+                self.stats["timeouts" if timed_out else "errors"] += 1
+                self._decrease(0.5)
+                return
+            per_round = elapsed / max(1, math.ceil(hosts / max(1, threads)))
+            self.latency = per_round if self.latency is None else (
+                SMOOTHING * per_round + (1 - SMOOTHING) * self.latency)
+            # The baseline is the best smoothed latency, allowed to creep up as the host mix changes
+            self.baseline = self.latency if self.baseline is None else min(self.baseline * 1.02, self.latency)
+            if self.latency > self.baseline * SLOWDOWN:
+                self._decrease(0.75)
+            else:
+                self._increase()
+            if elapsed > 0:
+                rate = hosts / elapsed
+                self.batch_size = int(min(max(rate * self.target_seconds, MIN_BATCH_SIZE), self.max_batch_size))
+
+    def _decrease(self, factor):
+        self.stats["decreases"] += 1
+        self.workers = max(1, int(self.workers * factor))
+        self.threads = max(MIN_THREADS, int(self.threads * factor))
+        self.batch_size = max(MIN_BATCH_SIZE, int(self.batch_size * factor))
+
+    def _increase(self):
+        if self.workers < self.max_workers or self.threads < self.max_threads:
+            self.stats["increases"] += 1
+        self.workers = min(self.max_workers, self.workers + 1)
+        self.threads = min(self.max_threads, self.threads + max(1, self.threads // 10))
+
+    def summary(self):
+        latency = f"{self.latency * 1000:.0f} ms" if self.latency is not None else "n/a"
+        return (f"Adaptive httpx: {self.stats['batches']} batches, {self.stats['timeouts']} timeouts, "
+                f"{self.stats['errors']} errors; ended at {self.workers}/{self.max_workers} processes x "
+                f"{self.threads}/{self.max_threads} threads, batches of {self.batch_size}, "
+                f"{latency} per round")
@@ -0,0 +1,293 @@
+"""Asyncio DNS pre-resolution stage that drops names which do not resolve.
+
+Queries are plain UDP A lookups built with struct, so the stage has no
+dependency beyond the standard library and can be pointed at any resolver,
+including a stub on 127.0.0.1 with a custom port.
+"""
+
+import asyncio
+import itertools
+import queue
+import random
+import socket
+import string
+import struct
+import threading
+import time
+
+import idna
+
+DEFAULT_RESOLVERS = ["8.8.8.8", "1.1.1.1", "9.9.9.9"]
+DEFAULT_CONCURRENCY = 500
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_RETRIES = 2
+
+TYPE_A = 1
+TYPE_CNAME = 5
+RCODE_NOERROR = 0
+RCODE_NXDOMAIN = 3
+
+RESOLVED = "resolved"
+NXDOMAIN = "nxdomain"
+WILDCARD = "wildcard"
+ERROR = "error"
+
+_DONE = object()
+
+
+def parse_resolver(value):
+    """Turn 'ip' or 'ip:port' into an (ip, port) address."""
+    value = value.strip()
+    if value.count(':') == 1:
+        host, port = value.split(':')
+        return host, int(port)
+    return value, 53
+
+
+def load_resolvers(path):
+    """Read resolver addresses from a file, one ip[:port] per line."""
+    with open(path, 'r') as file:
+        return [line.strip() for line in file if line.strip() and not line.startswith('#')]
+
+
+def encode_name(name):
+    if not name.isascii():
+        return b''.join(bytes([len(label)]) + label for label in idna.encode(name).split(b'.')) + b'\0'
+    return b''.join(bytes([len(label)]) + label.encode() for label in name.split('.')) + b'\0'
+
+
+def build_query(qid, name, qtype=TYPE_A):
+    """Build a recursive DNS query packet."""
+    return struct.pack(">HHHHHH", qid, 0x0100, 1, 0, 0, 0) + encode_name(name) + struct.pack(">HH", qtype, 1)
+
+
+def _skip_name(data, offset):
+    while True:
+        length = data[offset]
+        if length == 0:
+            return offset + 1
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        offset += length + 1
+
+
+def parse_response(data):
+    """Return (rcode, addresses, has_answers) from a DNS response packet."""
+    _, flags, qdcount, ancount, _, _ = struct.unpack_from(">HHHHHH", data)
+    offset = 12
+    for _ in range(qdcount):
+        offset = _skip_name(data, offset) + 4
+    addresses = set()
+    for _ in range(ancount):
+        offset = _skip_name(data, offset)
+        rtype, _, _, rdlength = struct.unpack_from(">HHIH", data, offset)
+        offset += 10
+        if rtype == TYPE_A and rdlength == 4:
+            addresses.add(socket.inet_ntoa(data[offset:offset + 4]))
+        offset += rdlength
+    return flags & 0x000F, addresses, ancount > 0
+
+
+class _DnsProtocol(asyncio.DatagramProtocol):
+    """One UDP socket to one resolver, matching responses to queries by id."""
+
+    def __init__(self):
+        self.transport = None
+        self.pending = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if len(data) < 12:
+            return
+        future = self.pending.pop(struct.unpack_from(">H", data)[0], None)
+        if future is not None and not future.done():
+            future.set_result(data)
+
+    def error_received(self, exc):
+        pass
+
+    def new_id(self):
+        while True:
+            qid = random.getrandbits(16)
+            if qid not in self.pending:
+                return qid
+
+
+def _put(out, item, stopped):
+    """Queue item unless stopped is set first; False if it was dropped."""
+    while not stopped.is_set():
+        try:
+            out.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class DnsFilter:
+    """Resolve candidates concurrently and pass on only the ones that resolve.
+
+    Names answering NXDOMAIN or with an empty answer are dropped. With
+    wildcard detection on, the first candidate under each parent zone
+    triggers a lookup of a random label in that zone; candidates whose A
+    records are all among the wildcard's are dropped too. Names that still
+    fail after all retries are passed on, so a flaky resolver never hides a
+    host from the HTTP probe.
+    """
+
+    def __init__(self, resolvers=None, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES, wildcard=True, on_drop=None, drop_batch=500):
+        self.resolvers = [parse_resolver(resolver) for resolver in (resolvers or DEFAULT_RESOLVERS)]
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.wildcard = wildcard
+        self.on_drop = on_drop
+        self.drop_batch = drop_batch
+        self.stats = {RESOLVED: 0, NXDOMAIN: 0, WILDCARD: 0, ERROR: 0}
+        self._protocols = []
+        self._rotation = None
+        self._zones = {}
+        self._dropped = []
+        self.elapsed = None
+
+    def filter(self, hosts):
+        """Yield the hosts that resolve, reading hosts lazily from any iterable.
+
+        If the consumer stops early, the lookups in flight are cancelled and
+        the resolver thread exits once its current read from hosts returns.
+        """
+        out = queue.Queue(maxsize=self.concurrency * 4)
+        stopped = threading.Event()
+        failure = []
+        start = time.monotonic()
+
+        def run():
+            try:
+                asyncio.run(self._run(hosts, out, stopped))
+            except Exception as e:
+                failure.append(e)
+            finally:
+                _put(out, _DONE, stopped)
+
+        thread = threading.Thread(target=run, name="dns", daemon=True)
+        thread.start()
+        try:
+            while True:
+                host = out.get()
+                if host is _DONE:
+                    break
+                yield host
+        finally:
+            stopped.set()
+        thread.join()
+        self.elapsed = time.monotonic() - start
+        if failure:
+            raise failure[0]
+
+    def summary(self):
+        dropped = self.stats[NXDOMAIN] + self.stats[WILDCARD]
+        total = dropped + self.stats[RESOLVED] + self.stats[ERROR]
+        share = dropped / total * 100 if total else 0.0
+        return (f"DNS: {self.stats[RESOLVED]} resolved, {self.stats[NXDOMAIN]} NXDOMAIN, "
+                f"{self.stats[WILDCARD]} wildcard, {self.stats[ERROR]} unresolved errors "
+                f"({share:.1f}% filtered before HTTP)")
+
+    async def _run(self, hosts, out, stopped):
+        loop = asyncio.get_running_loop()
+        for address in self.resolvers:
+            _, protocol = await loop.create_datagram_endpoint(_DnsProtocol, remote_addr=address)
+            self._protocols.append(protocol)
+        self._rotation = itertools.cycle(self._protocols)
+
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        iterator = iter(hosts)
+        try:
+            while not stopped.is_set():
+                # Pull from the (possibly blocking) source off the event loop
+                chunk = await loop.run_in_executor(None, lambda: list(itertools.islice(iterator, 256)))
+                if not chunk:
+                    break
+                for host in chunk:
+                    await slots.acquire()
+                    if stopped.is_set():
+                        break
+                    task = asyncio.ensure_future(self._check(host, out, loop, stopped))
+                    tasks.add(task)
+                    task.add_done_callback(lambda done: (tasks.discard(done), slots.release()))
+            if stopped.is_set():
+                for task in tasks:
+                    task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=stopped.is_set())
+        finally:
+            for protocol in self._protocols:
+                protocol.transport.close()
+            self._flush_dropped()
+
+    async def query(self, name):
+        """Return (rcode, addresses, has_answers), or None if every attempt failed."""
+        loop = asyncio.get_running_loop()
+        for _ in range(self.retries + 1):
+            protocol = next(self._rotation)
+            qid = protocol.new_id()
+            future = loop.create_future()
+            protocol.pending[qid] = future
+            protocol.transport.sendto(build_query(qid, name))
+            try:
+                data = await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError:
+                protocol.pending.pop(qid, None)
+                continue
+            try:
+                result = parse_response(data)
+            except (struct.error, IndexError):
+                continue
+            if result[0] in (RCODE_NOERROR, RCODE_NXDOMAIN):
+                return result
+        return None
+
+    async def _wildcard_addresses(self, zone):
+        if zone not in self._zones:
+            self._zones[zone] = asyncio.ensure_future(self._probe_wildcard(zone))
+        return await self._zones[zone]
+
+    async def _probe_wildcard(self, zone):
+        label = ''.join(random.choices(string.ascii_lowercase + string.digits, k=16))
+        result = await self.query(f"{label}.{zone}")
+        if result is None or result[0] != RCODE_NOERROR:
+            return set()
+        return result[1]
+
+    async def _check(self, host, out, loop, stopped):
+        result = await self.query(host)
+        if result is None:
+            status = ERROR
+        elif result[0] != RCODE_NOERROR or not result[2]:
+            status = NXDOMAIN
+        else:
+            status = RESOLVED
+            zone = host.partition('.')[2]
+            if self.wildcard and zone.count('.') >= 1:
+                wildcard = await self._wildcard_addresses(zone)
+                if wildcard and result[1] and result[1] <= wildcard:
+                    status = WILDCARD
+        self.stats[status] += 1
+
+        if status in (NXDOMAIN, WILDCARD):
+            self._dropped.append(host)
+            if len(self._dropped) >= self.drop_batch:
+                self._flush_dropped()
+            return
+        try:
+            out.put_nowait(host)
+        except queue.Full:
+            await loop.run_in_executor(None, _put, out, host, stopped)
+
+    def _flush_dropped(self):
+        dropped, self._dropped = self._dropped, []
+        if dropped and self.on_drop is not None:
+            self.on_drop(dropped)
@@ -0,0 +1,405 @@
+"""Compact, sorted result sets with a bloom filter and block index, plus set operations.
+
+A .sset file holds unique host names sorted by their reversed labels
+(com.example.api), so names under the same parent sit together and
+compress well. Names are stored in zlib-compressed blocks; a trailer holds
+the block index (first key, offset and size of every block) and a bloom
+filter, so membership tests touch at most one block and set operations
+stream both inputs in order without loading either. Text files stay the
+interchange format: every operation accepts plain newline files as input
+and `export` turns a set back into one.
+
+    python3 -m engine.resultset pack all_permutations.txt all_permutations.sset
+    python3 -m engine.resultset diff new.sset old.sset delta.sset
+    python3 -m engine.resultset export delta.sset delta.txt
+"""
+
+import argparse
+import bisect
+import hashlib
+import heapq
+import json
+import os
+import struct
+import sys
+import zlib
+
+from engine.dedup import HashStore
+
+MAGIC = b"SSET\x01"
+SUFFIX = ".sset"
+BLOCK_NAMES = 4096
+RUN_NAMES = 1000000  # names sorted in memory before spilling a run to disk
+BLOOM_BITS_PER_NAME = 10
+BLOOM_HASHES = 7
+_TRAILER = struct.Struct("<QQ")  # index offset, length of the compressed header before the bloom bits
+
+
+def sort_key(name):
+    """Order names by reversed labels so siblings and their parents cluster."""
+    return '.'.join(reversed(name.split('.')))
+
+
+def _bloom_positions(name, bits):
+    digest = hashlib.blake2b(name.encode(), digest_size=16).digest()
+    first, second = struct.unpack("<QQ", digest)
+    return [(first + i * second) % bits for i in range(BLOOM_HASHES)]
+
+
+class SetWriter:
+    """Write names in any order, with repeats, into a .sset file.
+
+    Works as a text sink (write() takes newline-terminated text), so it can
+    stand in for an open text file. Names are sorted in runs of RUN_NAMES;
+    larger inputs spill sorted runs next to the output and are merged on
+    close(), so memory stays bounded however many names are written. With
+    update, the names already in path are merged in rather than replaced.
+    count is the number of names in the file once closed, existing the
+    number it held before.
+    """
+
+    def __init__(self, path, run_names=RUN_NAMES, update=False):
+        self.path = path
+        self.run_names = run_names
+        self.update = update
+        self.count = 0
+        self.existing = 0
+        self._buffer = []
+        self._runs = []
+        self._spilled = 0
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, text):
+        for name in text.splitlines():
+            name = name.strip()
+            if name:
+                self.add(name)
+
+    def add(self, name):
+        self._buffer.append(name)
+        if len(self._buffer) >= self.run_names:
+            self._spill()
+
+    def flush(self):
+        pass
+
+    def _spill(self):
+        run = f"{self.path}.run{len(self._runs)}"
+        names = sorted(set(self._buffer), key=sort_key)
+        with open(run, 'w') as file:
+            file.writelines(f"{name}\n" for name in names)
+        self._spilled += len(names)
+        self._runs.append(run)
+        self._buffer = []
+
+    def _sorted_names(self):
+        if not self._runs:
+            return iter(sorted(set(self._buffer), key=sort_key))
+        if self._buffer:
+            self._spill()
+        files = [open(run, 'r') for run in self._runs]
+        self._files = files
+        return heapq.merge(*((line.rstrip('\n') for line in file) for file in files), key=sort_key)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._files = []
+        previous = None
+        try:
+            # Runs overlap in name counts, so this bounds the bloom size from above
+            upper = len(self._buffer) + self._spilled
+            names = self._sorted_names()
+            if self.update and os.path.exists(self.path):
+                previous = ResultSet(self.path)
+                self.existing = len(previous)
+                upper += self.existing
+                names = heapq.merge(names, previous, key=sort_key)
+            self.count = write_sorted(self.path, names, upper)
+        finally:
+            if previous is not None:
+                previous.close()
+            for file in self._files:
+                file.close()
+            for run in self._runs:
+                os.remove(run)
+
+
+class TextAppender:
+    """Append names to a plain text file, skipping the ones it already holds.
+
+    A text sink like SetWriter. The file's names are read once into a
+    HashStore, so they cost their fingerprints rather than full strings.
+    count is the number of names in the file, existing the number it held
+    when opened.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._seen = HashStore()
+        if os.path.exists(path):
+            with open(path, 'r') as file:
+                self._seen.update(line.strip() for line in file if line.strip())
+        self.existing = self.count = len(self._seen)
+        self._file = open(path, 'a')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, text):
+        for name in text.splitlines():
+            name = name.strip()
+            if name and self._seen.add(name):
+                self._file.write(f"{name}\n")
+                self.count += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def write_sorted(path, names, expected=None):
+    """Write names already in sort_key order (repeats allowed) to path; returns how many were kept."""
+    bits = max(64, (expected or 0) * BLOOM_BITS_PER_NAME)
+    bloom = bytearray((bits + 7) // 8)
+    index = []
+    count = 0
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(MAGIC)
+        block = []
+        previous = None
+
+        def flush_block():
+            data = zlib.compress('\n'.join(block).encode(), 6)
+            index.append([sort_key(block[0]), file.tell(), len(data), len(block)])
+            file.write(data)
+            block.clear()
+
+        for name in names:
+            if name == previous:
+                continue
+            previous = name
+            for position in _bloom_positions(name, bits):
+                bloom[position >> 3] |= 1 << (position & 7)
+            block.append(name)
+            count += 1
+            if len(block) >= BLOCK_NAMES:
+                flush_block()
+        if block:
+            flush_block()
+
+        index_offset = file.tell()
+        header = json.dumps({"count": count, "blocks": index, "bloom_bits": bits,
+                             "bloom_hashes": BLOOM_HASHES}).encode()
+        index_data = zlib.compress(header, 6) + bytes(bloom)
+        file.write(index_data)
+        file.write(_TRAILER.pack(index_offset, len(index_data) - len(bloom)))
+    os.replace(temp_path, path)
+    return count
+
+
+class ResultSet:
+    """Read-only view of a .sset file: sorted iteration, len() and fast membership."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        if self._file.read(len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not a result set file")
+        self._file.seek(-_TRAILER.size, os.SEEK_END)
+        end = self._file.tell()
+        index_offset, header_length = _TRAILER.unpack(self._file.read(_TRAILER.size))
+        self._file.seek(index_offset)
+        header = json.loads(zlib.decompress(self._file.read(header_length)))
+        self.bloom = self._file.read(end - index_offset - header_length)
+        self.count = header["count"]
+        self.blocks = header["blocks"]
+        self.bloom_bits = header["bloom_bits"]
+        self._first_keys = [block[0] for block in self.blocks]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def __len__(self):
+        return self.count
+
+    def _block(self, number):
+        _, offset, length, _ = self.blocks[number]
+        self._file.seek(offset)
+        return zlib.decompress(self._file.read(length)).decode().split('\n')
+
+    def __iter__(self):
+        for number in range(len(self.blocks)):
+            yield from self._block(number)
+
+    def __contains__(self, name):
+        for position in _bloom_positions(name, self.bloom_bits):
+            if not self.bloom[position >> 3] & (1 << (position & 7)):
+                return False
+        number = bisect.bisect_right(self._first_keys, sort_key(name)) - 1
+        return number >= 0 and name in self._block(number)
+
+    def export_text(self, path):
+        """Write the names to a plain newline-separated text file."""
+        with open(path, 'w') as file:
+            for number in range(len(self.blocks)):
+                file.write(''.join(f"{name}\n" for name in self._block(number)))
+
+    def bytes_used(self):
+        return os.path.getsize(self.path)
+
+
+def is_result_set(path):
+    with open(path, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def sorted_names(path):
+    """Iterate a .sset or text file's unique names in sort_key order."""
+    if is_result_set(path):
+        with ResultSet(path) as result_set:
+            yield from result_set
+        return
+    writer_path = f"{path}.{os.getpid()}.sorted{SUFFIX}"
+    with SetWriter(writer_path) as writer:
+        with open(path, 'r') as file:
+            for line in file:
+                writer.write(line)
+    try:
+        with ResultSet(writer_path) as result_set:
+            yield from result_set
+    finally:
+        os.remove(writer_path)
+
+
+def _dedup(names):
+    previous = None
+    for name in names:
+        if name != previous:
+            yield name
+            previous = name
+
+
+def union(paths, output):
+    """Write the union of several sets or text files to output."""
+    inputs = [sorted_names(path) for path in paths]
+    return write_sorted(output, _dedup(heapq.merge(*inputs, key=sort_key)), _estimate(paths))
+
+
+def _walk(left_path, right_path, keep_shared):
+    """Yield names of left that are (keep_shared) or are not (not keep_shared) in right."""
+    right = sorted_names(right_path)
+    current = next(right, None)
+    for name in sorted_names(left_path):
+        key = sort_key(name)
+        while current is not None and sort_key(current) < key:
+            current = next(right, None)
+        shared = current == name
+        if shared == keep_shared:
+            yield name
+
+
+def difference(left, right, output):
+    """Write names in left but not in right to output."""
+    return write_sorted(output, _walk(left, right, keep_shared=False), _estimate([left]))
+
+
+def intersection(left, right, output):
+    """Write names in both left and right to output."""
+    return write_sorted(output, _walk(left, right, keep_shared=True), _estimate([left]))
+
+
+def _estimate(paths):
+    total = 0
+    for path in paths:
+        if is_result_set(path):
+            with ResultSet(path) as result_set:
+                total += len(result_set)
+        else:
+            with open(path, 'rb') as file:
+                total += sum(1 for _ in file)
+    return total
+
+
+def pack(text_path, output):
+    """Convert a text file of names to a .sset file."""
+    with SetWriter(output) as writer:
+        with open(text_path, 'r') as file:
+            for line in file:
+                writer.write(line)
+    return writer.count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python3 -m engine.resultset",
+                                     description="Pack, query and combine compact result sets")
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("pack", help="Convert a text file of names to a .sset file")
+    command.add_argument("input")
+    command.add_argument("output")
+    command = commands.add_parser("export", help="Write a .sset file back out as text")
+    command.add_argument("input")
+    command.add_argument("output")
+    command = commands.add_parser("union", help="Union of sets or text files")
+    command.add_argument("inputs", nargs="+")
+    command.add_argument("--output", "-o", required=True)
+    for name in ("diff", "intersect"):
+        command = commands.add_parser(name, help=f"{'Names in LEFT but not RIGHT' if name == 'diff' else 'Names in both'}")
+        command.add_argument("left")
+        command.add_argument("right")
+        command.add_argument("output")
+    command = commands.add_parser("contains", help="Check names against a set; exits 1 if any is missing")
+    command.add_argument("input")
+    command.add_argument("names", nargs="+")
+    command = commands.add_parser("info", help="Show a set's size on disk")
+    command.add_argument("input")
+    args = parser.parse_args(argv)
+
+    if args.command == "pack":
+        print(f"Packed {pack(args.input, args.output)} names into {args.output}")
+    elif args.command == "export":
+        with ResultSet(args.input) as result_set:
+            result_set.export_text(args.output)
+            print(f"Exported {len(result_set)} names to {args.output}")
+    elif args.command == "union":
+        print(f"Union: {union(args.inputs, args.output)} names in {args.output}")
+    elif args.command == "diff":
+        print(f"Difference: {difference(args.left, args.right, args.output)} names in {args.output}")
+    elif args.command == "intersect":
+        print(f"Intersection: {intersection(args.left, args.right, args.output)} names in {args.output}")
+    elif args.command == "contains":
+        with ResultSet(args.input) as result_set:
+            missing = [name for name in args.names if name not in result_set]
+        for name in args.names:
+            print(f"{name}: {'missing' if name in missing else 'present'}")
+        return 1 if missing else 0
+    elif args.command == "info":
+        with ResultSet(args.input) as result_set:
+            used = result_set.bytes_used()
+            print(f"{args.input}: {len(result_set)} names in {len(result_set.blocks)} blocks, "
+                  f"{used / 1048576:.1f} MiB, {used / max(1, len(result_set)):.1f} bytes/name")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
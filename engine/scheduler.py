@@ -0,0 +1,88 @@
+"""Run independent tools concurrently and merge their results as they finish."""
+
+import logging
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS = 4
+
+
+class ScanCancelled(Exception):
+    """A scan stopped early because its cancel event was set."""
+
+
+def until_cancelled(items, cancel):
+    """Yield from items until cancel (a threading.Event, or None for never) is set."""
+    if cancel is None:
+        return items
+    return _until_cancelled(items, cancel)
+
+
+def _until_cancelled(items, cancel):
+    iterator = iter(items)
+    try:
+        for item in iterator:
+            if cancel.is_set():
+                return
+            yield item
+    finally:
+        # Let a generator source clean up (stop its processes) now rather than when collected
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+
+
+def format_elapsed(seconds):
+    """Format seconds as h:mm:ss."""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
+
+
+def _timed(run_tool, tool, command):
+    start = time.time()
+    try:
+        result = run_tool(tool, command)
+        return time.time() - start, result, None
+    except subprocess.TimeoutExpired as e:
+        logger.warning(f"Timeout running {tool}: {e}")
+        return time.time() - start, None, f"timeout after {e.timeout:.0f}s"
+    except (subprocess.CalledProcessError, OSError) as e:
+        logger.error(f"Error running {tool}: {e}")
+        return time.time() - start, None, str(e)
+
+
+def run_tools(tools, run_tool, merge, jobs=DEFAULT_JOBS):
+    """Run run_tool(name, command) for every entry in tools, at most jobs at a time.
+
+    merge(name, result) is called from the calling thread as each tool
+    finishes and returns how many new entries the result contributed.
+    Returns one summary dict per tool in completion order.
+    """
+    summaries = []
+    with ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix="tool") as executor:
+        futures = {executor.submit(_timed, run_tool, tool, command): tool for tool, command in tools.items()}
+        for future in as_completed(futures):
+            tool = futures[future]
+            elapsed, result, error = future.result()
+            new_count = merge(tool, result) if error is None else 0
+            summaries.append({"tool": tool, "elapsed": elapsed, "new": new_count, "error": error})
+
+    print_summary(summaries)
+    return summaries
+
+
+def print_summary(summaries):
+    """Log a per-tool table of elapsed time, new entries and failures."""
+    width = max([len(summary["tool"]) for summary in summaries] + [4])
+    logger.info(f"\n{'Tool':<{width}}  {'Elapsed':>8}  {'New':>9}  Status")
+    for summary in summaries:
+        if summary.get("stopped"):
+            status = "stopped"
+        else:
+            status = "ok" if summary["error"] is None else f"failed: {summary['error']}"
+        logger.info(f"{summary['tool']:<{width}}  {format_elapsed(summary['elapsed']):>8}  {summary['new']:>9}  "
+                    f"{status}")
+    logger.info("")
@@ -0,0 +1,69 @@
+"""Rank permutation candidates before probing so the likeliest live hosts go first."""
+
+import heapq
+import math
+import threading
+from collections import Counter
+
+PRIOR_RATE = 0.01  # live rate assumed for a tool or template with no history
+PRIOR_WEIGHT = 100  # how many candidates' worth of evidence the prior is worth
+
+
+def parent_zone(host):
+    return host.partition('.')[2]
+
+
+def smoothed_rate(candidates, live):
+    """Historical live rate, pulled towards PRIOR_RATE while there is little history."""
+    return (live + PRIOR_RATE * PRIOR_WEIGHT) / (candidates + PRIOR_WEIGHT)
+
+
+class CandidateScorer:
+    """Score candidates by where they came from and hand them back best first.
+
+    A candidate's score is the historical live rate of the patterns.txt
+    template that produced it (or of its generator, when the template is
+    unknown or has no history yet), scaled up by how many live hosts are
+    already known in its parent zone. The native generator names the seed
+    each candidate came from, and only a live seed earns that boost; the
+    external generators do not, so their candidates get it whenever their
+    parent zone has live hosts, which is where a live seed's permutations
+    land. history is ScanState.yields(): candidates probed and live counts
+    per ("tool", name) and ("template", name). With a budget only the top
+    budget candidates are kept, in a bounded heap.
+    """
+
+    def __init__(self, history=None, live_hosts=(), budget=None):
+        self.history = history or {}
+        self.live = set(live_hosts)
+        self.live_parents = Counter(parent_zone(host) for host in self.live)
+        self.budget = budget
+        self.seen = 0
+        self._heap = []
+        self._lock = threading.Lock()
+
+    def score(self, host, tool, template=None, seed=None):
+        key = ("template", template)
+        if template is None or key not in self.history:
+            key = ("tool", tool)
+        values = self.history.get(key, {})
+        rate = smoothed_rate(values.get("candidates", 0), values.get("live", 0))
+        if seed is not None and seed not in self.live:
+            return rate
+        return rate * (1 + math.log1p(self.live_parents.get(parent_zone(host), 0)))
+
+    def add(self, host, tool, template=None, seed=None):
+        score = self.score(host, tool, template, seed)
+        with self._lock:
+            # Ties go to the earlier candidate, so the generators' own order is kept
+            item = (score, -self.seen, host, tool, template)
+            self.seen += 1
+            if self.budget is None or len(self._heap) < self.budget:
+                heapq.heappush(self._heap, item)
+            elif item > self._heap[0]:
+                heapq.heapreplace(self._heap, item)
+
+    def ranked(self):
+        """The kept candidates as (host, tool, template), highest score first."""
+        with self._lock:
+            return [(host, tool, template) for _, _, host, tool, template in sorted(self._heap, reverse=True)]
@@ -0,0 +1,85 @@
+"""Split one scope into N deterministic shards and merge their partial results."""
+
+import glob
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from engine.dedup import fingerprint
+
+logger = logging.getLogger(__name__)
+
+SHARD_MODES = ("candidate", "seed")
+SHARD_DIR = "shards"
+_SHARD_NAME = re.compile(r"(\d+)-of-(\d+)")
+
+
+def parse_shard(value):
+    """Turn 'i/N' into (i, N), with shards numbered 0 to N-1."""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f"shard must look like i/N, got {value!r}")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"shard index must be between 0 and {count - 1}, got {value!r}")
+    return index, count
+
+
+def in_shard(host, shard):
+    """True if host belongs to shard (index, count).
+
+    Uses the high half of the dedup fingerprint, so the hash stores' slot
+    bits stay uniformly spread inside each shard.
+    """
+    index, count = shard
+    return (fingerprint(host.lower()) >> 32) % count == index
+
+
+def shard_dir(output_folder, shard):
+    index, count = shard
+    return os.path.join(output_folder, SHARD_DIR, f"{index}-of-{count}")
+
+
+def merge_shards(output_folder, output_file, name="live_subdomains.txt"):
+    """Union every shard's name file into output_file, appending only entries it lacks.
+
+    Shard folders may come from other hosts; copy them under
+    <output_folder>/shards/ first. Returns (total, new, missing) where missing
+    lists the 'i-of-N' shards that have no results yet.
+    """
+    shards = {}
+    for folder in glob.glob(os.path.join(output_folder, SHARD_DIR, "*-of-*")):
+        match = _SHARD_NAME.fullmatch(os.path.basename(folder))
+        if match and os.path.exists(os.path.join(folder, name)):
+            shards[(int(match.group(1)), int(match.group(2)))] = os.path.join(folder, name)
+    counts = {count for _, count in shards}
+    missing = [f"{index}-of-{count}" for count in sorted(counts) for index in range(count)
+               if (index, count) not in shards]
+
+    merged = set()
+    for path in shards.values():
+        with open(path, 'r') as file:
+            merged.update(line.strip() for line in file if line.strip())
+
+    existing = set()
+    if os.path.exists(output_file):
+        with open(output_file, 'r') as file:
+            existing = {line.strip() for line in file if line.strip()}
+    new = sorted(merged - existing)
+    with open(output_file, 'a') as file:
+        file.write(''.join(f"{host}\n" for host in new))
+    return len(merged | existing), len(new), missing
+
+
+def launch_local(count, run_shard):
+    """Run run_shard((i, count)) for every shard in its own process; returns {i: error or None}."""
+    errors = {}
+    with ProcessPoolExecutor(max_workers=count) as executor:
+        futures = {index: executor.submit(run_shard, (index, count)) for index in range(count)}
+        for index, future in futures.items():
+            error = future.exception()
+            if error is not None:
+                logger.error(f"Error in shard {index}/{count}: {error}")
+            errors[index] = None if error is None else str(error)
+    return errors
@@ -0,0 +1,278 @@
+"""Persistent per-domain scan state for incremental reruns."""
+
+import hashlib
+import sqlite3
+import threading
+import time
+
+STATE_FILE = "state.db"
+CHECKPOINT_SECONDS = 60
+
+
+def read_probes(path):
+    """Yield (host, probed_at, live) from another stage's state database, opened read-only."""
+    db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        yield from db.execute("SELECT host, probed_at, live FROM probes")
+    finally:
+        db.close()
+
+
+def seed_key(patterns_hash, generators, words_hash=None):
+    """Key a seed's permutation by the patterns, generators and {{word}} wordlist it was permuted with."""
+    parts = [patterns_hash, ",".join(sorted(generators))]
+    if "native" in generators:
+        # Only the native generator reads the wordlist
+        parts.append(words_hash or "default")
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def file_hash(path):
+    """Return the sha256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ScanState:
+    """Record which seeds were permuted with which patterns and which candidates were probed.
+
+    Kept as a sqlite database in the domain's results folder, so a rerun only
+    generates permutations for new seeds (or seeds last permuted with a
+    different patterns.txt, generator set or wordlist) and only probes candidates it has not probed
+    before, or probed longer than ttl seconds ago.
+
+    Each run is also recorded with its probe and live counts. Probes are
+    committed at least every CHECKPOINT_SECONDS, so a run that is killed
+    can be resumed from its last checkpoint, losing at most the batches
+    that were in flight.
+
+    Probes are tagged with the stage that made them; probes made by the
+    discovery stage (subTerra) can be imported, so both stages' known-live
+    and known-dead hosts are consulted before anything is probed again.
+
+    yields keeps, per generator and per patterns.txt template, how many
+    candidates it produced, how many were probed on its behalf, and how many
+    of those were live or found by no other generator, summed over runs.
+    """
+
+    def __init__(self, path, commit_every=5000, stage="permutation"):
+        self.path = path
+        self.stage = stage
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS seeds ("
+            "seed TEXT NOT NULL, seed_key TEXT NOT NULL, permuted_at REAL NOT NULL, "
+            "PRIMARY KEY (seed, seed_key)) WITHOUT ROWID"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS probes ("
+            "host TEXT PRIMARY KEY, probed_at REAL NOT NULL, live INTEGER NOT NULL, "
+            "stage TEXT NOT NULL DEFAULT 'permutation') WITHOUT ROWID"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "run_id TEXT PRIMARY KEY, started_at REAL NOT NULL, updated_at REAL NOT NULL, "
+            "probed INTEGER NOT NULL, live INTEGER NOT NULL, status TEXT NOT NULL) WITHOUT ROWID"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS yields ("
+            "kind TEXT NOT NULL, name TEXT NOT NULL, candidates INTEGER NOT NULL, live INTEGER NOT NULL, "
+            "produced INTEGER NOT NULL DEFAULT 0, unique_live INTEGER NOT NULL DEFAULT 0, "
+            "updated_at REAL NOT NULL, PRIMARY KEY (kind, name)) WITHOUT ROWID"
+        )
+        # Databases from earlier versions lack the newer columns, or keyed seeds by patterns.txt alone
+        self._rename_column("seeds", "patterns_hash", "seed_key")
+        self._add_column("probes", "stage", "TEXT NOT NULL DEFAULT 'permutation'")
+        self._add_column("yields", "produced", "INTEGER NOT NULL DEFAULT 0")
+        self._add_column("yields", "unique_live", "INTEGER NOT NULL DEFAULT 0")
+        self._db.commit()
+        self._pending = 0
+        self._commit_every = commit_every
+        self._last_commit = time.time()
+        self.run = None
+
+    def _add_column(self, table, column, definition):
+        if column not in {row[1] for row in self._db.execute(f"PRAGMA table_info({table})")}:
+            self._db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def _rename_column(self, table, old, new):
+        if old in {row[1] for row in self._db.execute(f"PRAGMA table_info({table})")}:
+            self._db.execute(f"ALTER TABLE {table} RENAME COLUMN {old} TO {new}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._checkpoint()
+            self._db.close()
+
+    def commit(self):
+        with self._lock:
+            self._checkpoint()
+
+    def _checkpoint(self):
+        now = time.time()
+        if self.run is not None:
+            self._db.execute("UPDATE runs SET probed = ?, live = ?, updated_at = ? WHERE run_id = ?",
+                             (self.run["probed"], self.run["live"], now, self.run["run_id"]))
+        self._db.commit()
+        self._pending = 0
+        self._last_commit = now
+
+    def interrupted_run(self):
+        """The most recent run that never finished, as a dict, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT run_id, started_at, updated_at, probed, live FROM runs "
+                "WHERE status = 'running' ORDER BY started_at DESC LIMIT 1"
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("run_id", "started_at", "updated_at", "probed", "live"), row))
+
+    def begin_run(self, run_id, resume=None):
+        """Start recording a run, or carry on with resume (a dict from interrupted_run)."""
+        with self._lock:
+            if resume is not None:
+                self.run = dict(resume)
+            else:
+                self._db.execute("UPDATE runs SET status = 'abandoned' WHERE status = 'running'")
+                now = time.time()
+                self.run = {"run_id": run_id, "started_at": now, "updated_at": now, "probed": 0, "live": 0}
+                self._db.execute(
+                    "INSERT INTO runs (run_id, started_at, updated_at, probed, live, status) "
+                    "VALUES (?, ?, ?, 0, 0, 'running')", (run_id, now, now)
+                )
+            self._checkpoint()
+        return self.run
+
+    def finish_run(self):
+        with self._lock:
+            if self.run is not None:
+                self._checkpoint()
+                self._db.execute("UPDATE runs SET status = 'finished' WHERE run_id = ?", (self.run["run_id"],))
+                self._db.commit()
+
+    def live_since(self, since):
+        """Hosts found live by probes at or after since."""
+        with self._lock:
+            return [host for (host,) in self._db.execute(
+                "SELECT host FROM probes WHERE live = 1 AND probed_at >= ?", (since,))]
+
+    def live_hosts(self):
+        """Every host whose last probe found it live."""
+        with self._lock:
+            return [host for (host,) in self._db.execute("SELECT host FROM probes WHERE live = 1")]
+
+    def yields(self):
+        """Historical counts keyed by (kind, name), kind being 'tool' or 'template'.
+
+        Each value holds produced (valid lines emitted), candidates (probed on
+        its behalf), live and unique_live (live hosts no other generator emitted).
+        """
+        with self._lock:
+            return {(kind, name): {"produced": produced, "candidates": candidates, "live": live,
+                                   "unique_live": unique_live}
+                    for kind, name, produced, candidates, live, unique_live in self._db.execute(
+                        "SELECT kind, name, produced, candidates, live, unique_live FROM yields")}
+
+    def record_yields(self, counts):
+        """Add a run's {(kind, name): {produced, candidates, live, unique_live}} counts to the history."""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO yields (kind, name, produced, candidates, live, unique_live, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (kind, name) DO UPDATE SET "
+                "produced = produced + excluded.produced, candidates = candidates + excluded.candidates, "
+                "live = live + excluded.live, unique_live = unique_live + excluded.unique_live, "
+                "updated_at = excluded.updated_at",
+                ((kind, name, values["produced"], values["candidates"], values["live"], values["unique_live"], now)
+                 for (kind, name), values in counts.items()),
+            )
+            self._db.commit()
+
+    def probed_since(self, host, since):
+        with self._lock:
+            row = self._db.execute("SELECT probed_at FROM probes WHERE host = ?", (host,)).fetchone()
+        return row is not None and row[0] >= since
+
+    def new_seeds(self, seeds, key):
+        """Return the seeds that have not yet been permuted with key (see seed_key)."""
+        with self._lock:
+            # One join against a temporary table instead of a query per seed
+            self._db.execute("CREATE TEMP TABLE new_seeds (position INTEGER PRIMARY KEY, seed TEXT NOT NULL)")
+            try:
+                self._db.executemany("INSERT INTO new_seeds (position, seed) VALUES (?, ?)", enumerate(seeds))
+                return [seed for (seed,) in self._db.execute(
+                    "SELECT seed FROM new_seeds WHERE NOT EXISTS "
+                    "(SELECT 1 FROM seeds WHERE seeds.seed = new_seeds.seed AND seeds.seed_key = ?) "
+                    "ORDER BY position", (key,))]
+            finally:
+                self._db.execute("DROP TABLE temp.new_seeds")
+
+    def mark_permuted(self, seeds, key):
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO seeds (seed, seed_key, permuted_at) VALUES (?, ?, ?)",
+                ((seed, key, now) for seed in seeds),
+            )
+            self._db.commit()
+
+    def known(self, host, ttl=None):
+        """(stage, live) from host's last probe, or None if it was never probed or (with a ttl) is stale."""
+        with self._lock:
+            row = self._db.execute("SELECT probed_at, stage, live FROM probes WHERE host = ?", (host,)).fetchone()
+        if row is None or (ttl is not None and time.time() - row[0] > ttl):
+            return None
+        return row[1], bool(row[2])
+
+    def import_probes(self, rows, stage):
+        """Merge (host, probed_at, live) rows probed by another stage, keeping whichever probe is newer.
+
+        Returns how many hosts were added or updated.
+        """
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT INTO probes (host, probed_at, live, stage) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (host) DO UPDATE SET probed_at = excluded.probed_at, live = excluded.live, "
+                "stage = excluded.stage WHERE excluded.probed_at > probes.probed_at",
+                ((host, probed_at, int(live), stage) for host, probed_at, live in rows),
+            )
+            self._db.commit()
+            return self._db.total_changes - before
+
+    def record_probes(self, hosts, live):
+        """Record a probed batch; live is the subset that responded."""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO probes (host, probed_at, live, stage) VALUES (?, ?, ?, ?)",
+                ((host, now, int(host in live), self.stage) for host in hosts),
+            )
+            if self.run is not None:
+                self.run["probed"] += len(hosts)
+                self.run["live"] += len(live)
+            self._pending += len(hosts)
+            if self._pending >= self._commit_every or now - self._last_commit >= CHECKPOINT_SECONDS:
+                self._checkpoint()
+
+    def stale_hosts(self, ttl):
+        """Yield hosts whose last probe is older than ttl seconds, using a separate connection."""
+        db = sqlite3.connect(self.path)
+        try:
+            cutoff = time.time() - ttl
+            for (host,) in db.execute("SELECT host FROM probes WHERE probed_at < ?", (cutoff,)):
+                yield host
+        finally:
+            db.close()
@@ -0,0 +1,136 @@
+"""Attribute live hosts to the generators and patterns that produced them, and prune weak generators."""
+
+import threading
+from collections import Counter, defaultdict
+
+from engine.dedup import fingerprint
+
+YIELD_POLICIES = ("off", "skip", "cap")
+DEFAULT_MIN_YIELD = 0.5  # unique live hosts per 1k candidates produced
+DEFAULT_YIELD_CAP = 10000
+MIN_EVIDENCE = 5000  # candidates a generator must have produced before the policy judges it
+FIELDS = ("produced", "candidates", "live", "unique_live")
+
+
+def per_thousand(found, total):
+    return 1000 * found / total if total else 0.0
+
+
+class YieldTracker:
+    """Follow candidates from the generators that produced them through liveness checking.
+
+    A candidate counts as produced by every generator that emitted it. It
+    is probed on behalf of the generator (and, for the native generator, the
+    patterns.txt template) that emitted it first, which is charged with the
+    probe and credited if it is live; a live host that only one generator
+    emitted counts towards that generator's unique yield. Candidates that
+    are never probed this run (skipped as probed before, or deferred by a
+    budget) are left out. Candidates waiting to be probed and this run's
+    live hosts are held in memory, and hosts probed dead only as a
+    fingerprint and the bits of the generators that emitted them, so a
+    generator emitting a host after it was probed is still counted as
+    producing it, whether the host was live or dead.
+    """
+
+    def __init__(self):
+        self.counts = defaultdict(Counter)
+        self._bits = {}
+        self._pending = {}  # host -> [tool, template, bitmask of the tools that emitted it]
+        self._live = {}
+        self._dead = {}  # fingerprint of a host probed dead -> bitmask of the tools that emitted it
+        self._lock = threading.Lock()
+
+    def _bit(self, tool):
+        return self._bits.setdefault(tool, 1 << len(self._bits))
+
+    def _produced(self, tool, template):
+        self.counts[("tool", tool)]["produced"] += 1
+        if template is not None:
+            self.counts[("template", template)]["produced"] += 1
+
+    def accepted(self, host, tool, template=None):
+        """host was first emitted by tool (from template) and is queued for probing."""
+        with self._lock:
+            self._produced(tool, template)
+            self._pending[host] = [tool, template, self._bit(tool)]
+
+    def duplicate(self, host, tool, template=None):
+        """tool emitted host after another generator (or itself) already had."""
+        with self._lock:
+            bit = self._bit(tool)
+            entry = self._pending.get(host) or self._live.get(host)
+            if entry is not None:
+                if not entry[2] & bit:
+                    self._produced(tool, template)
+                    entry[2] |= bit
+                return
+            key = fingerprint(host)
+            bits = self._dead.get(key)
+            if bits is not None and not bits & bit:
+                self._produced(tool, template)
+                self._dead[key] = bits | bit
+
+    def probed(self, hosts, live):
+        """Record a probed batch; live is the subset that responded."""
+        with self._lock:
+            for host in hosts:
+                entry = self._pending.pop(host, None)
+                if entry is None:
+                    continue
+                tool, template, _ = entry
+                hit = host in live
+                for key in (("tool", tool), ("template", template)):
+                    if key[1] is not None:
+                        self.counts[key]["candidates"] += 1
+                        self.counts[key]["live"] += hit
+                if hit:
+                    self._live[host] = entry
+                else:
+                    self._dead[fingerprint(host)] = entry[2]
+
+    def results(self):
+        """{(kind, name): {produced, candidates, live, unique_live}} for this run."""
+        with self._lock:
+            counts = {key: dict(counter) for key, counter in self.counts.items()}
+            for tool, template, bits in self._pending.values():
+                # Never probed, so no generator that emitted it is charged for it
+                for name, bit in self._bits.items():
+                    if bits & bit:
+                        counts[("tool", name)]["produced"] -= 1
+                if template is not None:
+                    counts[("template", template)]["produced"] -= 1
+            for tool, template, bits in self._live.values():
+                if bits != self._bits[tool]:
+                    continue
+                for key in (("tool", tool), ("template", template)):
+                    if key[1] is not None:
+                        counts[key]["unique_live"] = counts[key].get("unique_live", 0) + 1
+        return {key: {field: values.get(field, 0) for field in FIELDS} for key, values in counts.items()}
+
+
+def format_yields(counts, kind="tool"):
+    """A table of produced, probed, live and unique live counts with the unique yield per 1k produced."""
+    rows = sorted((name, values) for (row_kind, name), values in counts.items() if row_kind == kind)
+    width = max([len(name) for name, _ in rows] + [len(kind)])
+    lines = [f"{kind.capitalize():<{width}}  {'Produced':>9}  {'Probed':>9}  {'Live':>7}  {'Unique':>7}  {'Per 1k':>7}"]
+    for name, values in rows:
+        lines.append(f"{name:<{width}}  {values['produced']:>9}  {values['candidates']:>9}  {values['live']:>7}  "
+                     f"{values['unique_live']:>7}  {per_thousand(values['unique_live'], values['produced']):>7.2f}")
+    return '\n'.join(lines)
+
+
+def weak_sources(history, names, kind="tool", min_yield=DEFAULT_MIN_YIELD, min_evidence=MIN_EVIDENCE):
+    """Names whose historical unique live yield per 1k produced is under min_yield.
+
+    Only names that produced at least min_evidence candidates are judged.
+    The best of them is always spared, so a policy never prunes everything.
+    """
+    judged = {}
+    for name in names:
+        values = history.get((kind, name))
+        if values is not None and values["produced"] >= min_evidence:
+            judged[name] = per_thousand(values["unique_live"], values["produced"])
+    weak = [name for name, rate in judged.items() if rate < min_yield]
+    if weak and len(weak) == len(names):
+        weak.remove(max(weak, key=judged.get))
+    return weak
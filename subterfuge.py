@@ -1,15 +1,22 @@
 #!/usr/bin/env python3
 
-import re
-import idna
-import os
-import subprocess
-import sys
-import time
 import argparse
-from tqdm import tqdm  # Import tqdm for progress bar
+import logging
+import signal
+import sys
 
-print("""
+from engine.batch import DEFAULT_PARALLEL, load_domains
+from engine.dedup import STORES
+from engine.liveness import DEFAULT_BATCH_SIZE, DEFAULT_WORKERS
+from engine.permutation import (DEFAULT_GENERATORS, GENERATORS, batch_main, check_and_install_tools,
+                                check_live_subdomains, main, merge_main, shard_main)
+from engine.ratecontrol import DEFAULT_MAX_THREADS
+from engine.resolver import DEFAULT_CONCURRENCY, DEFAULT_RETRIES, DEFAULT_TIMEOUT, load_resolvers
+from engine.scheduler import DEFAULT_JOBS
+from engine.shard import SHARD_MODES, parse_shard
+from engine.yields import DEFAULT_MIN_YIELD, DEFAULT_YIELD_CAP, YIELD_POLICIES
+
+BANNER = """
               8        o                d'b                      
               8        8                8                        
 .oPYo. o    o 8oPYo.  o8P .oPYo. oPYo. o8P  o    o .oPYo. .oPYo. 
@@ -19,215 +26,113 @@ Yb..   8    8 8    8   8  8oooo8 8  `'  8   8    8 8    8 8oooo8
 :.....::.....::.....:::..::.....:..:::::..:::.....::....8 :.....:
 :::::::::::::::::::::::::::::::::::::::::::::::::::::ooP'.:::::::
 :::::::::::::::::::::::::::::::::::::::::::::::::::::...:::::::::
-""")
-
-total_subdomains = set()
-total_permutations = 0  # Initialize total permutations counter
-
-def run_command(command, env=None, timeout=300):
-    """Run a shell command."""
-    result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True, env=env, timeout=timeout)
-    return result.stdout.strip()
-
-def set_go_env():
-    go_path = run_command("go env GOPATH")
-    if not go_path:
-        go_path = os.path.expanduser("~/go")
-        os.environ["GOPATH"] = go_path
-        run_command(f"go env -w GOPATH={go_path}")
-    
-    go_bin_path = os.path.join(go_path, "bin")
-    if go_bin_path not in os.environ["PATH"]:
-        os.environ["PATH"] += os.pathsep + go_bin_path
-
-def install_tool(tool_name, install_command, env=None):
-    """Install a specific tool."""
-    try:
-        run_command(f"which {tool_name}", env=env)
-    except subprocess.CalledProcessError:
-        run_command(install_command, env=env)
-
-def check_and_install_tools():
-    """Check for the presence of required tools and install them if not present."""
-    set_go_env()
-    tools_install_commands = {
-        "alterx": "go install github.com/projectdiscovery/alterx/cmd/alterx@latest",
-        "gotator": "go install github.com/Josue87/gotator@latest",
-        "altdns": "pip install -q py-altdns",
-        "puredns": "go install github.com/d3mondev/puredns/v2@latest",
-        "ripgen": "cargo install ripgen",
-        "lepus": "pip install -q lepus",
-        "dnsgen": "python -m pip install -q dnsgen",
-        "httpx": "go install github.com/projectdiscovery/httpx/cmd/httpx@latest"
-    }
-    env = os.environ.copy()
-    for tool, install_command in tools_install_commands.items():
-        install_tool(tool, install_command, env=env)
-
-def is_valid_domain(domain):
-    """Validate if the domain is in a proper format."""
-    if not domain:
-        return False
-    try:
-        # Convert the domain to Punycode
-        punycode_domain = idna.encode(domain).decode('ascii')
-    except idna.IDNAError:
-        return False
-    
-    regex = re.compile(
-        r'^(?=.{1,253}$)(?!-)[A-Za-z0-9-]{1,63}(?<!-)'  # Subs and hosts
-        r'(\.(?!-)[A-Za-z0-9-]{1,63}(?<!-))*'           # Additional subdomains
-        r'\.[A-Za-z]{2,}$'                             # TLDs
-    )
-    return re.match(regex, punycode_domain) is not None
-    
-def run_tool(tool, command):
-    global total_subdomains, total_permutations
-    print(f"Running {tool}...")
-    try:
-        run_command(command, timeout=1800)  # Set a 30-minute timeout for each tool
-        permutations_file = command.split()[-1]
-        
-        # Read permutations and update counts
-        with open(permutations_file, 'r') as file:
-            result = {line.strip() for line in file if line.strip()}
-        
-        new_subdomains = result - total_subdomains
-        new_count = len(new_subdomains)
-        total_subdomains.update(new_subdomains)
-        total_permutations = len(total_subdomains)
-        print(f"{tool} finished - {new_count} new permutations added - Total Permutations: {total_permutations}")
-    except subprocess.CalledProcessError as e:
-        print(f"Error running {tool}: {e}")
-    except subprocess.TimeoutExpired as e:
-        print(f"Timeout running {tool}: {e}")
-
-def check_live_subdomains(subdomains_file, output_file):
-    """Check which subdomains are live using httpx with a progress bar."""
-    global total_subdomains  # Ensure we're using the global set
-
-    
-
-    # Read the subdomains from file
-    with open(subdomains_file, 'r') as file:
-        subdomains = {line.strip() for line in file if is_valid_domain(line.strip())}
-
-    total_count = len(subdomains)
-    
-    print(f"Validating {total_count} permutations...")
-    
-    if total_count == 0:
-        print("No subdomains to check.")
-        return set()
-
-    live_subdomains = set()
-
-    with tqdm(total=total_count, desc="Checking subdomains", unit="subdomain") as pbar:
-        for subdomain in subdomains:
-            command = f"httpx -silent -mc 200 -t 300 -u {subdomain}"
-            try:
-                result = subprocess.run(command, shell=True, capture_output=True, text=True)
-                if result.stdout.strip():  # Ensure non-empty response
-                    live_subdomains.add(subdomain)
-                pbar.update(1)
-            except subprocess.CalledProcessError as e:
-                print(f"Error running httpx for {subdomain}: {e}")
-            except subprocess.TimeoutExpired as e:
-                print(f"Timeout running httpx for {subdomain}: {e}")
-
-    # Read previously saved live subdomains
-    previous_live_subdomains = set()
-    if os.path.exists(output_file):
-        with open(output_file, 'r') as file:
-            previous_live_subdomains = {line.strip() for line in file if line.strip()}
-
-    # Determine new live subdomains
-    new_live_subdomains = live_subdomains - previous_live_subdomains
-    new_count = len(new_live_subdomains)
-
-    # Append new live subdomains to the output file
-    with open(output_file, 'a') as file:
-        for subdomain in new_live_subdomains:
-            file.write(f"{subdomain}\n")
-
-    print(f"{new_count} new live subdomains added.")
-    print(f"Live subdomains saved to {output_file}")
-
-    return live_subdomains
-
-
-def count_lines(file_path):
-    return int(subprocess.check_output(['wc', '-l', file_path]).split()[0])
-
-def main(domain):
-    start_time = time.time()
-    print(f"Discovery initiated for {domain}\n")
-
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    output_folder = os.path.join(base_dir, f"results/{domain}")
-    os.makedirs(output_folder, exist_ok=True)
-    
-    subdomain_file = os.path.join(base_dir, f"SubdomainTool/results/{domain}/subdomains.txt")
-    live_subdomains_file = os.path.join(base_dir, f"SubdomainTool/results/{domain}/live_subdomains.txt")
-    patterns_file = os.path.join(base_dir, "patterns.txt")  # Corrected path to the root level
-
-    check_and_install_tools()
-
-    # Check if either subdomains.txt or live_subdomains.txt exists
-    if not os.path.exists(subdomain_file) and not os.path.exists(live_subdomains_file):
-        print(f"No subdomain file found at {subdomain_file} or {live_subdomains_file}")
-        return
-    
-    # Use the appropriate file for subdomain processing, prioritize live_subdomains_file
-    if os.path.exists(live_subdomains_file):
-        file_to_use = live_subdomains_file
-        print(f"Using live_subdomains_file: {live_subdomains_file}")
-    else:
-        file_to_use = subdomain_file
-        print(f"Using subdomain_file: {subdomain_file}")
-
-    subdomain_count = count_lines(file_to_use)
-    pattern_count = count_lines(patterns_file)
-    print(f"Number of subdomains: {subdomain_count}")
-    print(f"Number of patterns: {pattern_count}\n")
-
-    tools = {
-        "alterx": f"alterx -l {file_to_use} -p {patterns_file} -ms 15 -o {output_folder}/alterx_permutations.txt",
-        "gotator": f"gotator -sub {file_to_use} -perm {patterns_file} -depth 0 -numbers 0 -mindup -adv -md > {output_folder}/gotator_permutations.txt",
-        "dnsgen": f"dnsgen {file_to_use} > {output_folder}/dnsgen_permutations.txt",
-        "ripgen": f"ripgen -d {file_to_use} > {output_folder}/ripgen_permutations.txt",
-        #"lepus": f"lepus.py --permutate -pw {patterns_file} -o {output_folder}/lepus_permutations.txt {file_to_use}"
-    }
-
-    for tool, command in tools.items():
-        run_tool(tool, command)
-
-    # Combine all permutations into one file
-    all_permutations_file = os.path.join(output_folder, "all_permutations.txt")
-    with open(all_permutations_file, 'w') as outfile:
-        for tool, _ in tools.items():
-            permutations_file = os.path.join(output_folder, f"{tool}_permutations.txt")
-            if os.path.exists(permutations_file):
-                with open(permutations_file, 'r') as infile:
-                    for line in infile:
-                        outfile.write(line)
-
-    # Check live subdomains using httpx
-    live_subdomains_file = os.path.join(output_folder, "live_subdomains.txt")
-    check_live_subdomains(all_permutations_file, live_subdomains_file)
-
-    end_time = time.time()
-    runtime = end_time - start_time
-    
-    # Print the results
-    total_live_count = len(open(live_subdomains_file).readlines())  # Line to print live subdomains count
-    print(f"\n[+] Total Live Subdomains: {total_live_count}")
-    print(f"Runtime: {int(runtime // 3600)}:{int((runtime % 3600) // 60)}:{int(runtime % 60)} (hh:mm:ss).")
+"""
 
 
 if __name__ == "__main__":
+    print(BANNER)
     parser = argparse.ArgumentParser(description="Subdomain enumeration script")
-    parser.add_argument("domain", help="The domain to enumerate subdomains for")
+    parser.add_argument("domain", nargs="?", help="The domain to enumerate subdomains for")
+    parser.add_argument("--domains", metavar="FILE",
+                        help="Scan every domain listed in FILE ('-' for stdin) in one process")
+    parser.add_argument("--parallel-domains", type=int, default=DEFAULT_PARALLEL,
+                        help="Domains scanned at once with --domains")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of concurrent httpx processes")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Hosts sent to each httpx process")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="Number of permutation tools to run at once")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Let httpx processes, threads and batch size adapt to observed latency, timeouts and errors")
+    parser.add_argument("--max-threads", type=int, default=DEFAULT_MAX_THREADS,
+                        help="Ceiling on httpx threads per process with --adaptive")
+    parser.add_argument("--rate-limit", type=int, metavar="RPS",
+                        help="Ceiling on httpx requests per second, split across --workers processes")
+    parser.add_argument("--dedup", choices=STORES, default="memory",
+                        help="Dedup backend: memory (set), hash (64-bit fingerprints) or sqlite (on disk)")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore saved state: permute every seed and probe every candidate")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the last interrupted run from its checkpoint instead of starting a new one")
+    parser.add_argument("--compact", action="store_true",
+                        help="Store all permutations as a sorted, compressed all_permutations.sset instead of text")
+    parser.add_argument("--prioritize", action="store_true",
+                        help="Score candidates by pattern, seed liveness and generator history and probe the best first")
+    parser.add_argument("--budget", type=int, metavar="N",
+                        help="Only probe the N highest-scoring candidates (implies --prioritize)")
+    parser.add_argument("--yield-policy", choices=YIELD_POLICIES, default="off",
+                        help="Skip or cap generators (and native patterns) whose historical unique yield is too low")
+    parser.add_argument("--min-yield", type=float, default=DEFAULT_MIN_YIELD, metavar="PER_1K",
+                        help="Unique live hosts per 1k candidates produced that a generator must reach under --yield-policy")
+    parser.add_argument("--yield-cap", type=int, default=DEFAULT_YIELD_CAP, metavar="N",
+                        help="New candidates a low-yield generator may add with --yield-policy cap")
+    parser.add_argument("--recheck-ttl", type=float, metavar="HOURS",
+                        help="Re-probe candidates last probed more than HOURS ago")
+    parser.add_argument("--generators", default=",".join(DEFAULT_GENERATORS),
+                        help=f"Comma-separated permutation generators to run, from: {', '.join(GENERATORS)}")
+    parser.add_argument("--words", help="Wordlist file or URL for {{word}} in the native generator, kept in the asset cache")
+    parser.add_argument("--offline", action="store_true",
+                        help="Never download: --words URLs must already be cached; implies --skip-bootstrap")
+    parser.add_argument("--max-permutations", type=int, help="Cap on native generator output")
+    parser.add_argument("--estimate", action="store_true", help="Print the estimated permutation count and exit")
+    parser.add_argument("--resolve", action="store_true",
+                        help="Resolve candidates before probing and drop NXDOMAIN and wildcard answers")
+    parser.add_argument("--resolvers", help="File of resolvers (ip or ip:port per line) for --resolve")
+    parser.add_argument("--dns-concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Concurrent DNS queries")
+    parser.add_argument("--dns-timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds to wait for each DNS answer")
+    parser.add_argument("--dns-retries", type=int, default=DEFAULT_RETRIES, help="DNS retries, rotating resolvers")
+    parser.add_argument("--no-wildcard-filter", action="store_true", help="Keep candidates that match a wildcard zone")
+    parser.add_argument("--shard", metavar="I/N",
+                        help="Only handle shard I of N (0 to N-1); results go to results/<domain>/shards/I-of-N")
+    parser.add_argument("--shard-by", choices=SHARD_MODES, default="candidate",
+                        help="Split the candidate hash space (no duplicate probes) or the seed list (less generation)")
+    parser.add_argument("--local-shards", type=int, metavar="N",
+                        help="Run all N shards as local processes, then merge them")
+    parser.add_argument("--merge-shards", action="store_true",
+                        help="Merge results/<domain>/shards/*/live_subdomains.txt into live_subdomains.txt and exit")
+    parser.add_argument("--skip-bootstrap", action="store_true",
+                        help="Trust the cached tool paths and skip tool discovery and installation")
     args = parser.parse_args()
 
-    main(args.domain)
+    dns = None
+    if args.resolve:
+        dns = {
+            "resolvers": load_resolvers(args.resolvers) if args.resolvers else None,
+            "concurrency": args.dns_concurrency,
+            "timeout": args.dns_timeout,
+            "retries": args.dns_retries,
+            "wildcard": not args.no_wildcard_filter,
+        }
+
+    probe = {"adaptive": args.adaptive, "max_threads": args.max_threads, "rate_limit": args.rate_limit}
+    generators = [generator.strip() for generator in args.generators.split(",") if generator.strip()]
+    unknown = [generator for generator in generators if generator not in GENERATORS]
+    if unknown:
+        parser.error(f"unknown generator(s): {', '.join(unknown)}")
+
+    if (args.domain is None) == (args.domains is None):
+        parser.error("give either a domain or --domains FILE")
+    if (args.local_shards or args.merge_shards) and args.domain is None:
+        parser.error("--local-shards and --merge-shards take a single domain")
+    try:
+        shard = parse_shard(args.shard) if args.shard else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    options = dict(workers=args.workers, batch_size=args.batch_size, jobs=args.jobs, dedup=args.dedup,
+                   full=args.full, recheck_ttl=args.recheck_ttl, generators=generators, words_file=args.words,
+                   max_permutations=args.max_permutations, estimate_only=args.estimate, dns=dns,
+                   skip_bootstrap=args.skip_bootstrap or args.offline, shard_by=args.shard_by, probe=probe, resume=args.resume,
+                   compact=args.compact, prioritize=args.prioritize, budget=args.budget,
+                   yield_policy=args.yield_policy, min_yield=args.min_yield, yield_cap=args.yield_cap,
+                   offline=args.offline)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+    # Exit through the normal unwinding on SIGTERM (e.g. instance preemption) so state is checkpointed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    if args.merge_shards:
+        merge_main(args.domain)
+    elif args.local_shards:
+        shard_main(args.domain, args.local_shards, **options)
+    elif args.domains:
+        batch_main(load_domains(args.domains), parallel_domains=args.parallel_domains, shard=shard, **options)
+    else:
+        main(args.domain, shard=shard, **options)
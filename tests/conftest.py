@@ -0,0 +1,57 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from engine.dedup import fingerprint  # noqa: E402
+from engine.liveness import batched  # noqa: E402
+
+DOMAIN = "a.test"
+
+
+def is_live(host):
+    return fingerprint(host) % 4 == 0
+
+
+class FakeChecker:
+    """Stands in for LivenessChecker: a fixed, pseudo-random quarter of the hosts respond."""
+
+    def __init__(self, batch_size=50):
+        self.batch_size = batch_size
+        self.probed = []
+
+    def check(self, hosts, total=None, desc=None, on_live=None, on_batch=None):
+        live = set()
+        for batch in batched(hosts, self.batch_size):
+            self.probed.extend(batch)
+            found = {host for host in batch if is_live(host)}
+            live |= found
+            if on_batch is not None:
+                on_batch(batch, found)
+        return live
+
+
+def write_seeds(base_dir, seeds):
+    folder = os.path.join(base_dir, "SubdomainTool", "results", DOMAIN)
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, "live_subdomains.txt"), 'w') as file:
+        file.writelines(f"{seed}\n" for seed in seeds)
+
+
+def read_lines(path):
+    with open(path) as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """A base_dir holding patterns.txt and a discovery live file with five seeds."""
+    shutil.copy(os.path.join(ROOT, "patterns.txt"), tmp_path)
+    write_seeds(tmp_path, [f"seed{i}.{DOMAIN}" for i in range(5)])
+    # Keeps find_go_path from shelling out to go
+    monkeypatch.setenv("GOPATH", str(tmp_path / "go"))
+    return tmp_path
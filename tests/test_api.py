@@ -0,0 +1,25 @@
+import os
+
+from conftest import DOMAIN, FakeChecker
+from engine.api import Scan
+
+
+def test_scan_reports_live_hosts_and_finishes(workspace):
+    events = []
+    scan = Scan(DOMAIN, base_dir=str(workspace), generators=["native"], checker=FakeChecker(), tools_ready={})
+    result = scan.run(events.append)
+    assert scan.status == "finished"
+    assert events[-1]["event"] == "finished" and events[-1]["result"] == result
+    assert scan.live and result["live"] == len(scan.live)
+    live_file = os.path.join(workspace, "results", DOMAIN, "live_subdomains.txt")
+    with open(live_file) as file:
+        assert set(file.read().split()) == scan.live
+
+
+def test_cancelled_scan_returns_none(workspace):
+    events = []
+    scan = Scan(DOMAIN, base_dir=str(workspace), generators=["native"], checker=FakeChecker(), tools_ready={})
+    scan.cancel()
+    assert scan.run(events.append) is None
+    assert scan.status == "cancelled"
+    assert events[-1]["event"] == "cancelled"
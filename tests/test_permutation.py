@@ -0,0 +1,82 @@
+import os
+import sqlite3
+
+import pytest
+
+from conftest import DOMAIN, FakeChecker, read_lines, write_seeds
+from engine import permutation
+from engine.state import STATE_FILE, ScanState
+
+
+def scan(base_dir, **options):
+    return permutation.main(DOMAIN, base_dir=str(base_dir), generators=["native"], checker=FakeChecker(),
+                            tools_ready={}, progress=False, **options)
+
+
+def test_rerun_keeps_every_candidate_in_all_permutations(workspace):
+    scan(workspace)
+    path = os.path.join(workspace, "results", DOMAIN, "all_permutations.txt")
+    first = read_lines(path)
+    assert first
+
+    # Nothing changed: nothing is permuted, and the file keeps the first run's candidates
+    scan(workspace)
+    assert read_lines(path) == first
+
+    # One new seed: only its candidates are generated, and they are added to the rest
+    write_seeds(workspace, [f"seed{i}.{DOMAIN}" for i in range(6)])
+    scan(workspace)
+    after = read_lines(path)
+    assert len(after) == len(set(after))
+    assert set(first) < set(after)
+    assert all("seed5" in name for name in set(after) - set(first))
+
+
+def test_rerun_keeps_every_candidate_in_compact_set(workspace):
+    from engine.resultset import ResultSet
+
+    scan(workspace, compact=True)
+    path = os.path.join(workspace, "results", DOMAIN, "all_permutations.sset")
+    with ResultSet(path) as result_set:
+        first = set(result_set)
+    write_seeds(workspace, [f"seed{i}.{DOMAIN}" for i in range(6)])
+    scan(workspace, compact=True)
+    with ResultSet(path) as result_set:
+        assert first < set(result_set)
+
+
+def test_interrupted_scan_never_records_live_hosts_missing_from_the_output(workspace, monkeypatch):
+    record_probes = ScanState.record_probes
+    calls = []
+
+    def interrupted(self, hosts, live):
+        record_probes(self, hosts, live)
+        calls.append(len(hosts))
+        if len(calls) == 3:
+            raise SystemExit(143)
+
+    monkeypatch.setattr(ScanState, "record_probes", interrupted)
+    with pytest.raises(SystemExit):
+        scan(workspace)
+
+    output_folder = os.path.join(workspace, "results", DOMAIN)
+    db = sqlite3.connect(os.path.join(output_folder, STATE_FILE))
+    try:
+        recorded_live = {host for (host,) in db.execute(
+            "SELECT host FROM probes WHERE live = 1 AND stage = 'permutation'")}
+    finally:
+        db.close()
+    assert recorded_live
+    assert recorded_live <= set(read_lines(os.path.join(output_folder, "live_subdomains.txt")))
+
+
+def test_rerun_only_probes_candidates_it_has_not_seen(workspace):
+    first = FakeChecker()
+    permutation.main(DOMAIN, base_dir=str(workspace), generators=["native"], checker=first, tools_ready={},
+                     progress=False)
+    write_seeds(workspace, [f"seed{i}.{DOMAIN}" for i in range(6)])
+    second = FakeChecker()
+    permutation.main(DOMAIN, base_dir=str(workspace), generators=["native"], checker=second, tools_ready={},
+                     progress=False)
+    assert first.probed and second.probed
+    assert not set(first.probed) & set(second.probed)
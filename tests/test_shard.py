@@ -0,0 +1,38 @@
+import pytest
+
+from engine.shard import in_shard, merge_shards, parse_shard, shard_dir
+
+HOSTS = [f"host{i}.a.test" for i in range(2000)]
+
+
+def test_parse_shard():
+    assert parse_shard("0/4") == (0, 4)
+    for value in ("4/4", "-1/4", "1", "a/b"):
+        with pytest.raises(ValueError):
+            parse_shard(value)
+
+
+def test_shards_partition_the_hosts():
+    shards = [{host for host in HOSTS if in_shard(host, (index, 4))} for index in range(4)]
+    assert sum(len(shard) for shard in shards) == len(HOSTS)
+    assert set().union(*shards) == set(HOSTS)
+    assert all(shard for shard in shards)
+    assert in_shard("HOST1.a.test", (0, 4)) == in_shard("host1.a.test", (0, 4))
+
+
+def test_merge_shards_appends_new_hosts_and_reports_missing_shards(tmp_path):
+    for index in (0, 2):
+        folder = shard_dir(str(tmp_path), (index, 3))
+        (tmp_path / folder).mkdir(parents=True)
+        hosts = [host for host in HOSTS if in_shard(host, (index, 3))]
+        (tmp_path / folder / "live_subdomains.txt").write_text(''.join(f"{host}\n" for host in hosts))
+    output = tmp_path / "live_subdomains.txt"
+    output.write_text("host0.a.test\nother.a.test\n")
+
+    total, new, missing = merge_shards(str(tmp_path), str(output))
+    lines = output.read_text().splitlines()
+    assert missing == ["1-of-3"]
+    assert len(lines) == len(set(lines)) == total
+    assert new == total - 2
+    assert lines[:2] == ["host0.a.test", "other.a.test"]
+    assert merge_shards(str(tmp_path), str(output))[1] == 0
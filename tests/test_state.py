@@ -0,0 +1,42 @@
+import sqlite3
+
+from engine.state import ScanState
+
+
+def test_new_seeds_keeps_input_order_and_skips_permuted_seeds(tmp_path):
+    with ScanState(str(tmp_path / "state.db")) as state:
+        state.mark_permuted(["b.a.test", "d.a.test"], "key")
+        seeds = ["e.a.test", "d.a.test", "c.a.test", "b.a.test", "a.a.test"]
+        assert state.new_seeds(seeds, "key") == ["e.a.test", "c.a.test", "a.a.test"]
+        assert state.new_seeds(seeds, "other key") == seeds
+        # The temporary table is dropped, so the query can run again
+        assert state.new_seeds(["b.a.test"], "key") == []
+
+
+def test_seeds_keyed_by_patterns_hash_are_migrated(tmp_path):
+    path = str(tmp_path / "state.db")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE seeds (seed TEXT NOT NULL, patterns_hash TEXT NOT NULL, permuted_at REAL NOT NULL, "
+               "PRIMARY KEY (seed, patterns_hash)) WITHOUT ROWID")
+    db.execute("INSERT INTO seeds VALUES ('b.a.test', 'key', 0)")
+    db.commit()
+    db.close()
+    with ScanState(path) as state:
+        assert state.new_seeds(["a.a.test", "b.a.test"], "key") == ["a.a.test"]
+
+
+def test_known_and_ttl(tmp_path):
+    with ScanState(str(tmp_path / "state.db"), stage="discovery") as state:
+        state.record_probes(["a.a.test", "b.a.test"], {"a.a.test"})
+        assert state.known("a.a.test") == ("discovery", True)
+        assert state.known("b.a.test") == ("discovery", False)
+        assert state.known("c.a.test") is None
+        assert state.known("a.a.test", ttl=-1) is None
+
+
+def test_import_probes_keeps_the_newer_probe(tmp_path):
+    with ScanState(str(tmp_path / "state.db")) as state:
+        state.record_probes(["a.a.test"], set())
+        assert state.import_probes([("a.a.test", 0, True), ("b.a.test", 0, True)], "discovery") == 1
+        assert state.known("a.a.test") == ("permutation", False)
+        assert state.known("b.a.test") == ("discovery", True)
@@ -0,0 +1,66 @@
+import pytest
+
+from engine.dedup import HashStore, MemoryStore, SqliteStore
+from engine.resultset import ResultSet, SetWriter, TextAppender, difference, intersection, union
+
+NAMES = [f"host{i}.a.test" for i in range(3000)]
+
+
+@pytest.fixture(params=["memory", "hash", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = MemoryStore()
+    elif request.param == "hash":
+        store = HashStore(capacity=16)
+    else:
+        store = SqliteStore(str(tmp_path / "dedup.db"), temporary=True)
+    yield store
+    store.close()
+
+
+def test_store_add_reports_new_entries(store):
+    assert all(store.add(name) for name in NAMES)
+    assert not any(store.add(name) for name in NAMES)
+    assert len(store) == len(NAMES)
+    assert "host7.a.test" in store
+    assert "other.a.test" not in store
+
+
+def write_set(path, names, update=False):
+    with SetWriter(str(path), update=update) as writer:
+        writer.write(''.join(f"{name}\n" for name in names))
+    return writer
+
+
+def test_set_writer_update_merges_with_the_existing_set(tmp_path):
+    path = tmp_path / "names.sset"
+    write_set(path, NAMES[:2000])
+    writer = write_set(path, NAMES[1000:], update=True)
+    assert (writer.existing, writer.count) == (2000, 3000)
+    with ResultSet(str(path)) as result_set:
+        assert len(result_set) == 3000
+        assert set(result_set) == set(NAMES)
+        assert "host2999.a.test" in result_set
+
+
+def test_text_appender_only_adds_new_names(tmp_path):
+    path = tmp_path / "names.txt"
+    path.write_text(''.join(f"{name}\n" for name in NAMES[:10]))
+    with TextAppender(str(path)) as appender:
+        appender.write(''.join(f"{name}\n" for name in NAMES[5:20]))
+    assert (appender.existing, appender.count) == (10, 20)
+    assert path.read_text().splitlines() == NAMES[:20]
+
+
+def test_set_operations(tmp_path):
+    left, right = tmp_path / "left.sset", tmp_path / "right.sset"
+    write_set(left, NAMES[:20])
+    write_set(right, NAMES[10:30])
+    for operation, expected in ((union, NAMES[:30]), (difference, NAMES[:10]), (intersection, NAMES[10:20])):
+        output = str(tmp_path / f"{operation.__name__}.sset")
+        if operation is union:
+            operation([str(left), str(right)], output)
+        else:
+            operation(str(left), str(right), output)
+        with ResultSet(output) as result_set:
+            assert set(result_set) == set(expected)
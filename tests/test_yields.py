@@ -0,0 +1,63 @@
+from engine.yields import YieldTracker, weak_sources
+
+
+def both_emit(host, live, late):
+    """native emits host first and alterx emits it again, before or after it is probed."""
+    tracker = YieldTracker()
+    tracker.accepted(host, "native", "{{sub}}-dev")
+    if not late:
+        tracker.duplicate(host, "alterx")
+    tracker.probed([host], live)
+    if late:
+        tracker.duplicate(host, "alterx")
+    return tracker.results()
+
+
+def test_dead_host_emitted_by_two_generators_counts_as_produced_by_both():
+    for late in (False, True):
+        counts = both_emit("dev.a.test", set(), late)
+        assert counts[("tool", "native")] == {"produced": 1, "candidates": 1, "live": 0, "unique_live": 0}
+        assert counts[("tool", "alterx")] == {"produced": 1, "candidates": 0, "live": 0, "unique_live": 0}
+        assert counts[("template", "{{sub}}-dev")]["produced"] == 1
+
+
+def test_live_host_emitted_by_two_generators_is_unique_to_neither():
+    for late in (False, True):
+        counts = both_emit("dev.a.test", {"dev.a.test"}, late)
+        assert counts[("tool", "native")] == {"produced": 1, "candidates": 1, "live": 1, "unique_live": 0}
+        assert counts[("tool", "alterx")] == {"produced": 1, "candidates": 0, "live": 0, "unique_live": 0}
+
+
+def test_repeats_from_the_same_generator_are_counted_once():
+    tracker = YieldTracker()
+    tracker.accepted("dev.a.test", "native")
+    tracker.duplicate("dev.a.test", "native")
+    tracker.probed(["dev.a.test"], {"dev.a.test"})
+    tracker.duplicate("dev.a.test", "native")
+    counts = tracker.results()
+    assert counts[("tool", "native")] == {"produced": 1, "candidates": 1, "live": 1, "unique_live": 1}
+
+
+def test_unprobed_candidates_are_not_charged():
+    tracker = YieldTracker()
+    tracker.accepted("dev.a.test", "native", "{{sub}}-dev")
+    tracker.duplicate("dev.a.test", "alterx")
+    counts = tracker.results()
+    assert counts[("tool", "native")]["produced"] == 0
+    assert counts[("tool", "alterx")]["produced"] == 0
+    assert counts[("template", "{{sub}}-dev")]["produced"] == 0
+
+
+def test_weak_sources_judges_yield_per_candidate_produced():
+    history = {
+        ("tool", "native"): {"produced": 10000, "candidates": 10000, "live": 50, "unique_live": 40},
+        ("tool", "alterx"): {"produced": 10000, "candidates": 100, "live": 5, "unique_live": 4},
+        ("tool", "dnsgen"): {"produced": 100, "candidates": 100, "live": 0, "unique_live": 0},
+    }
+    assert weak_sources(history, ["native", "alterx", "dnsgen"], min_yield=1) == ["alterx"]
+
+
+def test_weak_sources_spares_the_best_source():
+    history = {("tool", "native"): {"produced": 10000, "candidates": 10000, "live": 2, "unique_live": 2},
+               ("tool", "alterx"): {"produced": 10000, "candidates": 10000, "live": 1, "unique_live": 1}}
+    assert weak_sources(history, ["native", "alterx"], min_yield=1) == ["alterx"]